@@ -0,0 +1,68 @@
+"""
+finding the handlers for dense controller input:
+a scan of every handler's filters (as `MIDI` did before) against the
+`MIDIDispatcher` index, with 1, 10 and 100 handlers.
+
+run with `python benchmarks/midi_dispatch.py`
+"""
+import random
+import timeit
+
+import mido
+
+from iipyper.midi import _get_filter
+from iipyper.dispatch import MIDIDispatcher
+
+def scan(handlers, port, msg):
+    matched = []
+    for handler in handlers:
+        filters = handler[0].copy()
+        ok = 'port' not in filters or port in filters.pop('port')
+        ok &= ('ignore_port' not in filters
+            or port not in filters.pop('ignore_port'))
+        ok &= all(
+            filt is None or not hasattr(msg, k) or getattr(msg, k) in filt
+            for k, filt in filters.items())
+        if ok:
+            matched.append(handler)
+    return matched
+
+def index(d, port, msg):
+    return [
+        handler for residual, handler in d.handlers_for(port, msg)
+        if all(getattr(msg, k) in filt for k, filt, _ in residual)]
+
+def handlers(n):
+    # one handler per controller, plus some note handlers
+    hs = []
+    for i in range(n):
+        if i % 4 == 3:
+            filters = dict(type='note_on', channel=i%16)
+        else:
+            filters = dict(type='cc', channel=i%16, control=i%128)
+        hs.append(({k: _get_filter(v) for k, v in filters.items()}, i))
+    return hs
+
+def main(n=20_000):
+    r = random.Random(0)
+    msgs = [
+        mido.Message('control_change', channel=r.randrange(16),
+            control=r.randrange(128), value=r.randrange(128))
+        for _ in range(1000)]
+    for n_handlers in (1, 10, 100):
+        hs = handlers(n_handlers)
+        d = MIDIDispatcher()
+        for h in hs:
+            d.add(h)
+        k = n // len(msgs)
+        t_scan = timeit.timeit(
+            lambda: [scan(hs, 'port', m) for m in msgs], number=k)
+        t_index = timeit.timeit(
+            lambda: [index(d, 'port', m) for m in msgs], number=k)
+        print(
+            f'{n_handlers:4d} handlers: '
+            f'scan {1e6*t_scan/n:7.2f} us, index {1e6*t_index/n:5.2f} us '
+            f'per message ({t_scan/t_index:5.1f}x)')
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+MIDI feedback suppression on a dense two-way note stream:
+the previous `defaultdict(Queue)` of frozen mido messages against
+`FeedbackFilter` on raw bytes.
+
+every message sent is echoed back, interleaved with notes played in;
+and bursts of note offs which differ only by note number.
+
+run with `python benchmarks/midi_feedback.py`
+"""
+import random
+import time
+from collections import defaultdict
+from queue import Queue
+
+import mido
+from mido.frozen import freeze_message
+
+from iipyper.midi import FeedbackFilter
+
+class QueueFeedback:
+    """feedback suppression as `MIDI` did before"""
+    def __init__(self, window=1e-3):
+        self.recent_outputs = defaultdict(Queue)
+        self.max_feedback_ns = window * 1e9
+
+    def key(self, msg):
+        if msg.type == 'note_on' and msg.velocity == 0:
+            msg = mido.Message(
+                type='note_off', channel=msg.channel, note=msg.note,
+                time=0, velocity=0)
+        return freeze_message(msg)
+
+    def sent(self, msg, t):
+        self.recent_outputs[self.key(msg)].put(t)
+
+    def received(self, msg, t):
+        ts = self.recent_outputs[self.key(msg)]
+        while not ts.empty():
+            if t - ts.get() < self.max_feedback_ns:
+                return True
+        return False
+
+class BytesFeedback:
+    def __init__(self, window=1e-3):
+        self.fb = FeedbackFilter(window)
+
+    def sent(self, msg, t):
+        self.fb.sent(msg.bytes(), t)
+
+    def received(self, msg, t):
+        return self.fb.received(msg.bytes(), t)
+
+def stream(n):
+    """(time in ns, 'sent' or 'received', message)"""
+    r = random.Random(0)
+    events = []
+    t = 0
+    for i in range(n):
+        t += r.randrange(20_000, 200_000)
+        msg = mido.Message(
+            'note_on', channel=r.randrange(16), note=r.randrange(128),
+            velocity=r.choice([0, r.randrange(1, 128)]))
+        if r.random() < 0.5:
+            events.append((t, 'sent', msg))
+            events.append((t + r.randrange(100_000, 500_000), 'received', msg))
+        else:
+            events.append((t, 'received', msg))
+    events.sort(key=lambda e: e[0])
+    return events
+
+def burst(n):
+    """all-notes-off bursts: every note off on one channel with velocity 0,
+    sent at once then echoed, so the keys differ only by note number
+    """
+    events = []
+    t = 0
+    for i in range(n // 256):
+        msgs = [
+            mido.Message('note_off', channel=i % 16, note=note, velocity=0)
+            for note in range(128)]
+        events.extend((t, 'sent', m) for m in msgs)
+        events.extend((t + 200_000, 'received', m) for m in msgs)
+        t += 2_000_000
+    return events
+
+def main(n=100_000):
+    for stream_name, events in (
+            ('random notes', stream(n)), ('note off bursts', burst(n))):
+        print(f'{stream_name}:')
+        for name, fb in (
+                ('Queue', QueueFeedback()), ('FeedbackFilter', BytesFeedback())):
+            suppressed = 0
+            t0 = time.perf_counter()
+            for t, kind, msg in events:
+                if kind == 'sent':
+                    fb.sent(msg, t)
+                else:
+                    suppressed += fb.received(msg, t)
+            dt = time.perf_counter() - t0
+            keys = (len(fb.recent_outputs) if isinstance(fb, QueueFeedback)
+                else fb.fb.stats()['keys'])
+            print(
+                f'  {name:15} {1e6*dt/len(events):5.2f} us per message, '
+                f'{suppressed} suppressed, {keys} keys held')
+
+if __name__=='__main__':
+    main()
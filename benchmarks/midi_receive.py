@@ -0,0 +1,44 @@
+"""
+MIDI receive overhead on a dense CC stream: mido messages
+(`Message.from_bytes`, as the mido callback does, then `MIDI._dispatch`)
+against raw input with a `raw=True` handler (`MIDI._dispatch_raw`).
+
+run with `python benchmarks/midi_receive.py`
+"""
+import random
+import time
+import timeit
+
+import mido
+
+from iipyper.midi import MIDI
+
+def main(n=20_000):
+    def make(raw):
+        midi = MIDI(
+            in_ports=['none'], virtual_in_ports=0, virtual_out_ports=0,
+            verbose=0)
+        @midi.handle(type='cc', control=range(64), raw=raw)
+        def on_cc(msg):
+            pass
+        return midi
+    midi, midi_raw = make(False), make(True)
+
+    r = random.Random(0)
+    stream = [
+        [0xb0 | r.randrange(16), r.randrange(128), r.randrange(128)]
+        for _ in range(1000)]
+    k = n // len(stream)
+
+    t_mido = timeit.timeit(lambda: [
+        midi._dispatch(mido.Message.from_bytes(d), 'in') for d in stream],
+        number=k)
+    t_raw = timeit.timeit(lambda: [
+        midi_raw._dispatch_raw(d, 'in', time.perf_counter_ns()) for d in stream],
+        number=k)
+    print(
+        f'mido {1e6*t_mido/n:5.2f} us, raw {1e6*t_raw/n:5.2f} us '
+        f'per message ({t_mido/t_raw:4.1f}x)')
+
+if __name__=='__main__':
+    main()
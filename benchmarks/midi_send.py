@@ -0,0 +1,65 @@
+"""
+MIDI send overhead: `MIDI.send` / `MIDI.note_on` against `MIDI.send_raw`
+and `MIDI.send_batch`, with feedback suppression on.
+
+the output port stands in for a mido rtmidi port, with a no-op
+`send_message`, so only the Python side is measured.
+
+run with `python benchmarks/midi_send.py`
+"""
+import timeit
+from threading import RLock
+
+import numpy as np
+
+from iipyper.midi import MIDI
+
+class RtMidi:
+    def send_message(self, data):
+        pass
+
+class Output:
+    """like mido.backends.rtmidi.Output"""
+    def __init__(self):
+        self._send_lock = RLock()
+        self._rt = RtMidi()
+    def send(self, msg):
+        with self._send_lock:
+            self._rt.send_message(msg.bytes())
+
+def main(n=20_000):
+    midi = MIDI(
+        in_ports=['none'], virtual_in_ports=0, virtual_out_ports=0, verbose=0)
+    midi.out_ports['out'] = Output()
+
+    def per_message(name, f, k=1):
+        t = timeit.timeit(f, number=n//k)
+        print(f'{name:32} {1e6*t/n:6.2f} us per message')
+
+    print('single note:')
+    per_message('MIDI.note_on', lambda: midi.note_on(channel=1, note=60, velocity=100))
+    per_message('MIDI.send(mido.Message)', lambda: midi.send(
+        'note_on', channel=1, note=60, velocity=100))
+    per_message('MIDI.send_raw', lambda: midi.send_raw((0x91, 60, 100)))
+
+    print('chord of 4:')
+    chord = [(0x91, n, 100) for n in (60, 64, 67, 71)]
+    def mido_chord():
+        for s, n, v in chord:
+            midi.note_on(channel=1, note=n, velocity=v)
+    per_message('MIDI.note_on x4', mido_chord, 4)
+    per_message('MIDI.send_batch', lambda: midi.send_batch(chord), 4)
+
+    print('CC sweep of 128:')
+    sweep = np.zeros((128, 3), np.uint8)
+    sweep[:, 0] = 0xb1
+    sweep[:, 1] = 1
+    sweep[:, 2] = np.arange(128)
+    def mido_sweep():
+        for v in range(128):
+            midi.control_change(channel=1, control=1, value=v)
+    per_message('MIDI.control_change x128', mido_sweep, 128)
+    per_message('MIDI.send_batch (numpy)', lambda: midi.send_batch(sweep), 128)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+micro-benchmark of encoding and decoding numpy arrays sent over OSC:
+iipyper JSON strings against iipyper binary blobs.
+
+run with `python benchmarks/ndarray_codec.py`
+"""
+import timeit
+
+from iipyper.osc import _ndarray_converter, _build_message, _encode_items
+from iipyper.types import *
+
+sizes = [16, 256, 4096, 65536]
+
+def throughput(size, t, n):
+    """MB of float32 data per second"""
+    return 4*size*n / t / 1e6
+
+def main(n_base=2_000):
+    convert = _ndarray_converter()
+    convert_typed = _ndarray_converter(np.float32)
+    print('encode (array to OSC message):')
+    for size in sizes:
+        # fewer repetitions for large arrays, since the JSON path is slow
+        n = max(20, n_base * 256 // size)
+        a = np.random.rand(size).astype(np.float32)
+        t_json = timeit.timeit(
+            lambda: _build_message('/a', [ndarray_to_json(a)]), number=n)
+        t_blob = timeit.timeit(
+            lambda: _build_message('/a', _encode_items([a])), number=n)
+        print(
+            f'{size:>6} float32: '
+            f'JSON {1e6*t_json/n:8.1f} us ({throughput(size, t_json, n):7.1f} MB/s), '
+            f'blob {1e6*t_blob/n:6.1f} us ({throughput(size, t_blob, n):7.1f} MB/s), '
+            f'speedup {t_json/t_blob:6.1f}x')
+
+    print('decode (OSC argument to array):')
+    for size in sizes:
+        # fewer repetitions for large arrays, since the JSON path is slow
+        n = max(20, n_base * 256 // size)
+        a = np.random.rand(size).astype(np.float32)
+        s = ndarray_to_json(a)
+        b = ndarray_to_blob(a)
+        t_json = timeit.timeit(lambda: convert(s), number=n)
+        t_blob = timeit.timeit(lambda: convert(b), number=n)
+        t_typed = timeit.timeit(lambda: convert_typed(b), number=n)
+        print(
+            f'{size:>6} float32: '
+            f'JSON {1e6*t_json/n:8.1f} us ({len(s):>7} bytes), '
+            f'blob {1e6*t_blob/n:6.1f} us ({len(b):>7} bytes), '
+            f'typed blob {1e6*t_typed/n:6.1f} us, '
+            f'speedup {t_json/t_blob:6.1f}x')
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+throughput of decoding synthetic OSC traffic:
+python-osc `OscMessage` / `OscBundle` against `iipyper.decode.decode_packet`,
+alone and through `OSCDispatcher.call_handlers_for_packet`.
+
+run with `python benchmarks/osc_decode.py`
+"""
+import random
+import timeit
+
+from pythonosc import osc_message, osc_bundle
+from pythonosc.parsing import osc_types
+
+from iipyper.dispatch import OSCDispatcher, _timed_messages
+from iipyper.decode import decode_packet
+from iipyper.osc import _build_message, _pack_bundles
+
+def python_osc(dgram):
+    if dgram.startswith(b'#bundle'):
+        return _timed_messages(osc_bundle.OscBundle(dgram), [])
+    return [(osc_types.IMMEDIATELY, osc_message.OscMessage(dgram))]
+
+def traffic(kind, n=1000):
+    r = random.Random(0)
+    if kind == 'iff':
+        return [_build_message('/particles/pos', [i, r.random(), r.random()])
+            for i in range(n)]
+    if kind == 'f x16':
+        return [_build_message('/synth/params', [r.random() for _ in range(16)])
+            for i in range(n)]
+    if kind == 'isTs':
+        return [_build_message('/note', [i, 'on', True, 'piano'])
+            for i in range(n)]
+    if kind == 'ib':
+        return [_build_message('/frame', [i, r.randbytes(256)])
+            for i in range(n)]
+    if kind == 'bundle x8 iff':
+        msgs = [_build_message('/particles/pos', [i, r.random(), r.random()])
+            for i in range(8)]
+        now = osc_types.write_date(osc_types.IMMEDIATELY)
+        return _pack_bundles(msgs, now, 1472) * (n//8)
+    raise ValueError(kind)
+
+def main(repeat=5):
+    for kind in ('iff', 'f x16', 'isTs', 'ib', 'bundle x8 iff'):
+        packets = traffic(kind)
+        n = len(packets) * repeat
+        line = f'{kind:14}'
+        for name, decode in (('python-osc', python_osc), ('fast', decode_packet)):
+            t = timeit.timeit(
+                lambda: [decode(p) for p in packets], number=repeat)
+            line += f' {name} {n/t/1e3:7.1f}k packets/s'
+        for name, decoder in (('python-osc', None), ('fast', decode_packet)):
+            d = OSCDispatcher()
+            d.set_decoder(decoder)
+            d.map('/*', lambda *a: None)
+            t = timeit.timeit(
+                lambda: [d.call_handlers_for_packet(p, None) for p in packets],
+                number=repeat)
+            line += f' | dispatch {name} {n/t/1e3:7.1f}k/s'
+        print(line)
+
+if __name__=='__main__':
+    main()
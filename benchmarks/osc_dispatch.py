@@ -0,0 +1,38 @@
+"""
+address resolution with many routes, as in `OSCUpdaters` setups:
+python-osc `Dispatcher` against iipyper `OSCDispatcher`.
+
+run with `python benchmarks/osc_dispatch.py`
+"""
+import timeit
+
+from pythonosc.dispatcher import Dispatcher
+from iipyper.dispatch import OSCDispatcher
+
+def routes(n):
+    species = [f'species{i}' for i in range(n//10)]
+    attrs = ['pos', 'vel', 'size', 'color', 'active']
+    r = [f'/tolvera/{s}/{a}' for s in species for a in attrs]
+    r += [f'/tolvera/{s}/get/{a}/*' for s in species for a in attrs]
+    return r
+
+def main(n=10_000):
+    for n_routes in (10, 100, 1000):
+        rs = routes(n_routes)
+        addresses = [r.replace('*', 'all') for r in rs]
+        line = f'{len(rs):5d} routes:'
+        for name, d in (
+                ('python-osc', Dispatcher()),
+                ('uncached', OSCDispatcher(cache_size=0)),
+                ('cached', OSCDispatcher())):
+            for r in rs:
+                d.map(r, print)
+            k = max(1, n // len(addresses))
+            t = timeit.timeit(
+                lambda: [list(d.handlers_for_address(a)) for a in addresses], 
+                number=k)
+            line += f' {name} {1e6*t/(k*len(addresses)):8.2f} us'
+        print(line)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+micro-benchmark of OSC message parsing for `OSC.handle`:
+the interpreted `_parse_osc_items` against the precompiled `_OSCParser`.
+
+run with `python benchmarks/osc_parse.py`
+"""
+import inspect
+import timeit
+
+from iipyper.osc import _OSCParser, _parse_osc_items, _signature_info
+from iipyper.types import *
+
+def varp(route, *items): pass
+def pos(route, x:float, y:float, z:float): pass
+def pos_kw(route, x:float, y:float=0, z:float=0): pass
+def splat(route, x:Splat[3], *items, y:Splat[None]=[], z:object=None): pass
+
+cases = [
+    ('*items', varp, (0.1, 0.2, 0.3, 0.4)),
+    ('positional', pos, (0.1, 0.2, 0.3)),
+    ('positional + key', pos_kw, (0.1, 'z', 0.3)),
+    ('Splat + JSON', splat, (1, 2, 3, 'a', 'y', 4, 5, 'z', '{"k":0}')),
+]
+
+def main(n=100_000):
+    for name, f, items in cases:
+        sig_info, all_default = _signature_info(inspect.signature(f))
+        allow_pos = not all_default
+        parser = _OSCParser(sig_info, allow_pos, True)
+        t_interp = timeit.timeit(
+            lambda: _parse_osc_items(items, sig_info, allow_pos, True, 0), 
+            number=n)
+        t_compiled = timeit.timeit(lambda: parser(items), number=n)
+        print(
+            f'{name:>18}: '
+            f'interpreted {1e9*t_interp/n:7.0f} ns, '
+            f'compiled {1e9*t_compiled/n:7.0f} ns, '
+            f'speedup {t_interp/t_compiled:4.1f}x')
+
+if __name__=='__main__':
+    main()
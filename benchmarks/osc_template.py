@@ -0,0 +1,36 @@
+"""
+micro-benchmark of sending the same route with the same types repeatedly:
+`OSC.send` against an `OSC.template`.
+
+run with `python benchmarks/osc_template.py`
+"""
+import timeit
+
+from iipyper import OSC
+from iipyper.osc import _build_message
+
+messages = [
+    ('/particles/pos', 'iff', (3, 0.5, 0.25)),
+    ('/synth/params', 'iffffffff', (1,) + (0.5,)*8),
+    ('/label', 'is', (3, 'particle')),
+]
+
+def main(n=50_000):
+    # nothing listens on the client port; UDP sends don't wait for a receiver
+    osc = OSC(port=9979, verbose=0)
+    osc.create_client('sink', '127.0.0.1', 9978)
+    for route, typetags, args in messages:
+        t = osc.template(route, typetags)
+        t_build = timeit.timeit(lambda: _build_message(route, args), number=n)
+        t_encode = timeit.timeit(lambda: t.encode(*args), number=n)
+        t_send = timeit.timeit(lambda: osc.send(route, *args), number=n)
+        t_tsend = timeit.timeit(lambda: t.send(*args), number=n)
+        print(
+            f'{route:15} ,{typetags:10} '
+            f'encode: python-osc {1e6*t_build/n:5.2f} us, '
+            f'template {1e6*t_encode/n:5.2f} us ({t_build/t_encode:4.1f}x); '
+            f'send: OSC.send {1e6*t_send/n:5.2f} us, '
+            f'template {1e6*t_tsend/n:5.2f} us ({t_send/t_tsend:4.1f}x)')
+
+if __name__=='__main__':
+    main()
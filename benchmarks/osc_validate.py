@@ -0,0 +1,47 @@
+"""
+per-message cost of the `OSC.handle` validation modes,
+using the routes from tests/test_osc.py.
+
+messages are passed straight to the route handler (parse, validate, call),
+without going through a socket.
+
+run with `python benchmarks/osc_validate.py`
+"""
+import json
+import timeit
+
+from iipyper import OSC
+from iipyper.types import *
+
+def route_name(route, *items): pass
+def route_name2(route, x:Splat[None], y:Splat[None], z:object): pass
+def route_name3(route, x:Splat[3], *items, y:Splat[None]=[], z:object=None): pass
+def long_long_stupidly_long_route_name(route, *items): pass
+def route_name4(route, items:Splat[None]): pass
+def route_name5(route, a:float, b:float, c:int=0): pass
+
+cases = [
+    (route_name, (777, None, 'abc', [1,2,3])),
+    (route_name2, (1,2,3, 'y', 'a','b','c', 'z', json.dumps({'key':0}))),
+    (route_name3, (1,2,3, 777, None, 'abc', [1,2,3], 'y', 'a','b','c')),
+    (long_long_stupidly_long_route_name, (1,)*1024),
+    (route_name4, (1,)*1024),
+    (route_name5, (0.5, 1.5, 'c', 2)),
+]
+
+def main(n=20_000):
+    osc = OSC(port=0, verbose=0)
+    client = ('127.0.0.1', 9999)
+    for f, items in cases:
+        line = f'{f.__name__[:24]:>24}:'
+        for validate in ('off', 'fast', 'strict'):
+            route = f'/{f.__name__}/{validate}'
+            osc.handle(route, validate=validate)(f)
+            h = next(iter(osc.dispatcher.handlers_for_address(route)))
+            t = timeit.timeit(
+                lambda: h.callback(client, route, *items), number=n)
+            line += f' {validate} {1e6*t/n:7.2f} us'
+        print(line)
+
+if __name__=='__main__':
+    main()
@@ -12,13 +12,14 @@ from .midi import *
 from .osc import *
 from .audio import *
 from .tui import *
-from .state import _lock
+from .osc import _Bundle
+from .state import _lock, _stop_loop
 
 _threads = []
 _thread_exit = False
 def repeat(
         interval:float=None, between_calls:bool=False, 
-        lock:bool=True, tick:float=5e-3, err_file=None):
+        lock:bool=True, tick:float=5e-3, err_file=None, bundle:bool=False):
     """
     Decorate a function to be called repeatedly in a loop.
     
@@ -32,6 +33,8 @@ def repeat(
         tick: minimum interval to sleep for 
             (will spinlock for the remainder for more precise timing)
             if None, always sleep
+        bundle: if True, OSC messages sent during each call are 
+            sent as bundles when it returns (see `OSC.bundle`)
     """
     # close the decorator over interval and lock arguments
     def decorator(f):
@@ -39,7 +42,11 @@ def repeat(
             while not _thread_exit:
                 t = time.perf_counter()
                 try:
-                    returned_interval = maybe_lock(f, lock)
+                    if bundle:
+                        with _Bundle():
+                            returned_interval = maybe_lock(f, lock)
+                    else:
+                        returned_interval = maybe_lock(f, lock)
                 except Exception:
                     if os.getenv('IIPYPER_PDB'):
                         import pdb; pdb.post_mortem()
@@ -127,7 +134,11 @@ def start_audio():
             a.stream.start()
 
 def run(main=None):
-    """call this on your main function to run it as an iipyper app"""
+    """call this on your main function to run it as an iipyper app
+    
+    `async def` OSC handlers and `OSC(backend='asyncio')` servers share one 
+    iipyper event loop on its own thread, which is stopped on exit.
+    """
     try:
         if main is not None:
             fire.Fire(main)
@@ -149,6 +160,7 @@ def run(main=None):
             a.stream.close()
         for f in _cleanup_fns:
             f()
+        _stop_loop()
         exit(0)
     except Exception:
         if os.getenv('IIPYPER_PDB'):
@@ -0,0 +1,283 @@
+import time
+import socket
+import traceback
+import itertools as it
+from threading import Lock, Condition, Thread
+from collections import OrderedDict, deque
+
+from pythonosc.udp_client import SimpleUDPClient
+
+class UDPSocketPool:
+    """
+    a few unconnected UDP sockets shared by any number of destinations,
+    sending with `sendto`.
+    """
+    def __init__(self, sockets:int=1, allow_broadcast:bool=False):
+        """
+        Args:
+            sockets: number of sockets per address family
+            allow_broadcast: allow sending to broadcast addresses
+        """
+        assert sockets > 0
+        self.n = sockets
+        self.allow_broadcast = allow_broadcast
+        self.lock = Lock()
+        # address family -> list of sockets, created on first use
+        self.sockets = {}
+        self._next = it.count()
+        self.sent = 0
+        self.bytes_sent = 0
+        self.errors = 0
+
+    def socket(self, family) -> socket.socket:
+        """get one of the sockets for an address family, in rotation"""
+        socks = self.sockets.get(family)
+        if socks is None:
+            with self.lock:
+                socks = self.sockets.get(family)
+                if socks is None:
+                    socks = [self._make_socket(family) for _ in range(self.n)]
+                    self.sockets[family] = socks
+        return socks[next(self._next) % self.n]
+
+    def _make_socket(self, family):
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        if self.allow_broadcast:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        return sock
+
+    def sendto(self, data:bytes, family, sockaddr):
+        try:
+            self.socket(family).sendto(data, sockaddr)
+        except OSError:
+            self.errors += 1
+            raise
+        self.sent += 1
+        self.bytes_sent += len(data)
+
+    def stats(self) -> dict:
+        return {
+            'sockets': sum(len(s) for s in self.sockets.values()),
+            'sent': self.sent,
+            'bytes_sent': self.bytes_sent,
+            'send_errors': self.errors,
+        }
+
+    def close(self):
+        with self.lock:
+            for socks in self.sockets.values():
+                for sock in socks:
+                    sock.close()
+            self.sockets = {}
+
+class PooledUDPClient(SimpleUDPClient):
+    """
+    `SimpleUDPClient` which sends on a shared `UDPSocketPool`
+    instead of owning a socket. the destination is resolved once.
+    """
+    def __init__(self, pool:UDPSocketPool, address:str, port:int,
+            family=socket.AF_UNSPEC):
+        """
+        Args:
+            pool: sockets to send with
+            address: IP address or hostname of server
+            port: port of server
+            family: address family parameter (passed to socket.getaddrinfo)
+        """
+        af, _, _, _, sockaddr = socket.getaddrinfo(
+            address, port, type=socket.SOCK_DGRAM, family=family)[0]
+        self._pool = pool
+        self._family = af
+        self._sockaddr = sockaddr
+        self._address = address
+        self._port = port
+
+    @property
+    def _sock(self):
+        return self._pool.socket(self._family)
+
+    def send(self, content):
+        """Sends an `OscMessage` or `OscBundle` (anything with a `dgram`)"""
+        self._pool.sendto(content.dgram, self._family, self._sockaddr)
+
+class ClientCache:
+    """
+    LRU-bounded map from (host, port) to clients,
+    for reply addresses which may be many and short-lived.
+    """
+    def __init__(self, make_client, maxsize:int=256):
+        """
+        Args:
+            make_client: called with (host, port) to make a missing client
+            maxsize: max number of clients to keep
+        """
+        self.make_client = make_client
+        self.maxsize = maxsize
+        self.lock = Lock()
+        self.clients = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, address):
+        with self.lock:
+            client = self.clients.get(address)
+            if client is not None:
+                self.hits += 1
+                self.clients.move_to_end(address)
+                return client
+            self.misses += 1
+            client = self.clients[address] = self.make_client(*address)
+            if len(self.clients) > self.maxsize:
+                self.clients.popitem(last=False)
+                self.evictions += 1
+            return client
+
+    def __contains__(self, address):
+        return address in self.clients
+
+    def __len__(self):
+        return len(self.clients)
+
+    def stats(self) -> dict:
+        return {
+            'senders': len(self.clients),
+            'max_senders': self.maxsize,
+            'sender_hits': self.hits,
+            'sender_misses': self.misses,
+            'sender_evictions': self.evictions,
+        }
+
+class AsyncSender:
+    """
+    calls `send` on a background thread for items put in a bounded queue,
+    so the thread putting them never waits on encoding or the network.
+
+    with `coalesce`, an item put while another with the same key is still
+    waiting replaces it (latest value wins), keeping the earlier place in line.
+    when the queue is full, items are dropped and counted.
+    """
+    def __init__(self, send, queue_size:int=1024, coalesce:bool=False,
+            name:str='iipyper sender'):
+        """
+        Args:
+            send: called with the contents of each item
+            queue_size: max number of items waiting
+            coalesce: replace waiting items which have the same key
+            name: name of the thread
+        """
+        self.send = send
+        self.queue_size = queue_size
+        self.coalesce = coalesce
+        self.cond = Condition()
+        # (key, item); item is None for coalesced keys, which are in `latest`
+        self.queue = deque()
+        self.latest = {}
+        self.busy = False
+        self.closed = False
+        self.queued = 0
+        self.coalesced = 0
+        self.overflows = 0
+        self.sent = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.thread = Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def put(self, item:tuple, key=None) -> bool:
+        """
+        queue `send(*item)`.
+
+        Args:
+            key: with `coalesce`, items with equal keys replace each other 
+                while waiting. None to never coalesce.
+
+        Returns:
+            False if the item was dropped because the queue was full
+        """
+        with self.cond:
+            if key is not None and self.coalesce:
+                if key in self.latest:
+                    self.latest[key] = item
+                    self.coalesced += 1
+                    return True
+                if len(self.queue) >= self.queue_size:
+                    return self._overflow()
+                self.latest[key] = item
+                self.queue.append((key, None))
+            else:
+                if len(self.queue) >= self.queue_size:
+                    return self._overflow()
+                self.queue.append((None, item))
+            self.queued += 1
+            self.max_depth = max(self.max_depth, len(self.queue))
+            # also wakes any `wait`, which shares the condition
+            self.cond.notify_all()
+        return True
+
+    def _overflow(self):
+        self.overflows += 1
+        # report without flooding the output
+        n = self.overflows
+        if n & (n-1) == 0:
+            print(f'iipyper: send queue full, {n} messages dropped so far')
+        return False
+
+    def depth(self) -> int:
+        """number of items waiting"""
+        return len(self.queue)
+
+    def wait(self, timeout:float=None) -> bool:
+        """
+        wait until everything queued so far has been sent.
+
+        Returns:
+            False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while self.queue or self.busy:
+                remaining = (
+                    None if deadline is None else deadline - time.monotonic())
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'depth': len(self.queue),
+            'max_depth': self.max_depth,
+            'queued': self.queued,
+            'coalesced': self.coalesced,
+            'overflows': self.overflows,
+            'sent': self.sent,
+            'errors': self.errors,
+        }
+
+    def close(self):
+        """stop the thread after sending what is already queued"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+                while not self.queue:
+                    if self.closed:
+                        return
+                    self.cond.wait()
+                key, item = self.queue.popleft()
+                if item is None:
+                    item = self.latest.pop(key)
+                self.busy = True
+            try:
+                self.send(*item)
+                self.sent += 1
+            except Exception:
+                self.errors += 1
+                traceback.print_exc()
@@ -0,0 +1,164 @@
+import struct
+import functools as ft
+
+from pythonosc import osc_bundle, osc_message
+from pythonosc.parsing import osc_types
+
+# struct formats of fixed-size typetags
+_fixed = {'i': 'i', 'f': 'f', 'd': 'd', 'h': 'q'}
+# typetags with no argument data
+_constants = {'T': True, 'F': False, 'N': None}
+
+_int = struct.Struct('>i')
+_bundle_prefix = b'#bundle\x00'
+
+class Message:
+    """
+    decoded OSC message, which can be used in place of a python-osc
+    `OscMessage` (by `Handler.invoke` and `OSCDispatcher`)
+    """
+    __slots__ = ('address', 'args', 'dgram')
+    def __init__(self, address:str, args, dgram:bytes):
+        self.address = address
+        self.args = args
+        self.dgram = dgram
+
+    @property
+    def params(self) -> list:
+        return list(self.args)
+
+    def __iter__(self):
+        return iter(self.args)
+
+    def __str__(self):
+        return f"{self.address} {' '.join(str(p) for p in self.args)}"
+
+def _string(dgram:bytes, i:int):
+    """string starting at 4-aligned index `i`, and the index after it"""
+    end = dgram.index(b'\x00', i)
+    return dgram[i:end].decode('utf-8'), (end & ~3) + 4
+
+@ft.lru_cache(maxsize=256)
+def _compile(typetags:bytes):
+    """
+    function decoding the arguments of a message with `typetags`
+    (without the leading comma) from a datagram and index,
+    or None if they need python-osc.
+    """
+    try:
+        tags = typetags.decode('ascii')
+    except UnicodeDecodeError:
+        return None
+
+    if all(t in _fixed for t in tags):
+        # one struct for the whole message
+        s = struct.Struct('>'+''.join(_fixed[t] for t in tags))
+        size = s.size
+        unpack = s.unpack_from
+        def decode(dgram, i):
+            if len(dgram) < i + size:
+                raise ValueError('datagram is too short')
+            return unpack(dgram, i)
+        return decode
+
+    # runs of fixed-size arguments are unpacked by one struct each
+    ops = []
+    run = ''
+    for t in tags:
+        if t in _fixed:
+            run += _fixed[t]
+            continue
+        if run:
+            ops.append((0, struct.Struct('>'+run)))
+            run = ''
+        if t in _constants:
+            ops.append((1, _constants[t]))
+        elif t == 's':
+            ops.append((2, None))
+        elif t == 'b':
+            ops.append((3, None))
+        else:
+            return None
+    if run:
+        ops.append((0, struct.Struct('>'+run)))
+
+    def decode(dgram, i):
+        args = []
+        for op, x in ops:
+            if op == 0:
+                args.extend(x.unpack_from(dgram, i))
+                i += x.size
+            elif op == 1:
+                args.append(x)
+            elif op == 2:
+                s, i = _string(dgram, i)
+                args.append(s)
+            else:
+                n, = _int.unpack_from(dgram, i)
+                i += 4
+                if n < 0 or i + n > len(dgram):
+                    raise ValueError('datagram is too short')
+                args.append(dgram[i:i+n])
+                i += n + (-n % 4)
+        return args
+    return decode
+
+def decode_message(dgram:bytes):
+    """
+    decode an OSC message datagram.
+    common typetags (i, f, d, h, s, b, T, F, N) are decoded with a `struct`
+    format compiled once per typetag string; anything else by python-osc.
+
+    Returns:
+        a `Message`, or a python-osc `OscMessage`
+    Raises:
+        `pythonosc.osc_message.ParseError`
+    """
+    try:
+        address, i = _string(dgram, 0)
+        if i >= len(dgram):
+            # no typetags
+            return Message(address, (), dgram)
+        if dgram[i] == 44: # ','
+            end = dgram.index(b'\x00', i)
+            decode = _compile(dgram[i+1:end])
+            if decode is not None:
+                return Message(address, decode(dgram, (end & ~3) + 4), dgram)
+    except (ValueError, IndexError, struct.error) as e:
+        raise osc_message.ParseError(f'Found incorrect datagram: {e}')
+    return osc_message.OscMessage(dgram)
+
+def _bundle_messages(dgram:bytes, timed:list) -> list:
+    timetag, i = osc_types.get_date(dgram, len(_bundle_prefix))
+    while i < len(dgram):
+        n, = _int.unpack_from(dgram, i)
+        i += 4
+        if n < 0 or i + n > len(dgram):
+            raise osc_bundle.ParseError('bundle is too short')
+        content = dgram[i:i+n]
+        i += n
+        if content.startswith(_bundle_prefix):
+            _bundle_messages(content, timed)
+        else:
+            timed.append((timetag, decode_message(content)))
+    return timed
+
+def decode_packet(dgram:bytes) -> list:
+    """
+    decode an OSC packet with `decode_message`.
+
+    Returns:
+        list of (timetag, message) pairs, with the timetag of the innermost
+        bundle containing each message, or `IMMEDIATELY` if not in a bundle.
+        empty if the packet is not OSC.
+    Raises:
+        `pythonosc.osc_message.ParseError` or `pythonosc.osc_bundle.ParseError`
+    """
+    if dgram.startswith(_bundle_prefix):
+        try:
+            return _bundle_messages(dgram, [])
+        except (struct.error, osc_types.ParseError) as e:
+            raise osc_bundle.ParseError(f'Found incorrect bundle: {e}')
+    if dgram.startswith(b'/'):
+        return [(osc_types.IMMEDIATELY, decode_message(dgram))]
+    return []
@@ -0,0 +1,353 @@
+import re
+import functools as ft
+
+from pythonosc import osc_bundle, osc_message
+from pythonosc.parsing import osc_types
+from pythonosc.dispatcher import Dispatcher
+from mido.messages.specs import SPEC_BY_TYPE
+
+# characters which make the rest of a mapped address a regex
+_pattern_chars = set('*?[]{}().+^$|\\')
+
+def _literal_prefix(address:str) -> str:
+    """the part of a mapped address before any pattern characters"""
+    for i,c in enumerate(address):
+        if c in _pattern_chars:
+            return address[:i]
+    return address
+
+def _timed_messages(bundle, timed):
+    """flatten a bundle into `timed` as (timetag, message) pairs,
+    keeping the timetags of nested bundles
+    """
+    for content in bundle:
+        if isinstance(content, osc_bundle.OscBundle):
+            _timed_messages(content, timed)
+        else:
+            timed.append((bundle.timestamp, content))
+    return timed
+
+class _TrieNode:
+    __slots__ = ('children', 'patterns')
+    def __init__(self):
+        # address segment -> _TrieNode
+        self.children = {}
+        # (start of next segment, compiled pattern, mapped address)
+        self.patterns = []
+
+class OSCDispatcher(Dispatcher):
+    """
+    drop-in replacement for the python-osc `Dispatcher`, which matches
+    incoming addresses against every mapped address with a regex.
+
+    instead, literal addresses are found with a dict lookup, and wildcard
+    addresses are kept in a trie keyed on the address segments before the
+    first wildcard, so only patterns sharing a prefix with the incoming
+    address are tried. resolved handlers are kept in a bounded LRU cache,
+    which is invalidated whenever the mapping changes.
+
+    matching is the same as `Dispatcher.handlers_for_address` in python-osc 1.9,
+    with handlers returned as a tuple instead of a generator.
+    """
+    def __init__(self, cache_size:int=1024):
+        """
+        Args:
+            cache_size: max number of incoming addresses to remember
+                the handlers for.
+        """
+        super().__init__()
+        self._trie = _TrieNode()
+        # mapped address -> order of first mapping
+        self._order = {}
+        # incremented on every change to the mapping
+        self._generation = 0
+        self._resolve_cached = ft.lru_cache(maxsize=cache_size)(self._resolve)
+        self.pool = None
+        self.ordered = None
+        self.scheduler = None
+        self.decoder = None
+
+    def set_scheduler(self, scheduler):
+        """
+        hold the contents of bundles timetagged in the future,
+        and dispatch them at their timetag.
+
+        Args:
+            scheduler: an `iipyper.Scheduler`, or None to dispatch
+                bundle contents as soon as they arrive
+        """
+        self.scheduler = scheduler
+
+    def set_decoder(self, decoder):
+        """
+        decode packets with `decoder` instead of python-osc.
+
+        Args:
+            decoder: function from a datagram to a list of
+                (timetag, message) pairs, like `iipyper.decode.decode_packet`,
+                or None to use python-osc
+        """
+        self.decoder = decoder
+
+    def set_pool(self, pool, ordered:str=None):
+        """
+        invoke handlers on a `WorkerPool` instead of the receiving thread.
+
+        Args:
+            pool: a `WorkerPool`, or None to invoke handlers directly
+            ordered: None, or 'route' to keep messages to the same address 
+                in order, or 'sender' to keep messages from the same sender
+                in order.
+        """
+        if ordered not in (None, 'route', 'sender'):
+            raise ValueError(
+                "OSCDispatcher: ordered should be None, 'route' or 'sender'")
+        self.pool = pool
+        self.ordered = ordered
+
+    def call_handlers_for_packet(self, data, client_address):
+        """
+        Invoke handlers for all messages in OSC packet.
+        like python-osc, but handlers may run on a `WorkerPool` (see `set_pool`),
+        and bundles timetagged in the future may be held (see `set_scheduler`).
+
+        Args:
+            data: Data of packet
+            client_address: Address of client this packet originated from
+        Returns: 
+            return values of handlers which ran immediately on this thread
+        """
+        results = []
+        try:
+            if self.decoder is not None:
+                timed = self.decoder(data)
+            elif osc_bundle.OscBundle.dgram_is_bundle(data):
+                timed = _timed_messages(osc_bundle.OscBundle(data), [])
+            elif osc_message.OscMessage.dgram_is_message(data):
+                timed = [(osc_types.IMMEDIATELY, osc_message.OscMessage(data))]
+            else:
+                return results
+        except (osc_bundle.ParseError, osc_message.ParseError):
+            return results
+
+        for timetag, message in timed:
+            handlers = self.handlers_for_address(message.address)
+            if not handlers:
+                continue
+            if timetag > 0 and self.scheduler is not None:
+                # the scheduler calls now if it's late already
+                self.scheduler.at(
+                    timetag, self._invoke, 
+                    handlers, client_address, message, None)
+            else:
+                self._invoke(handlers, client_address, message, results)
+        return results
+
+    def _invoke(self, handlers, client_address, message, results):
+        pool = self.pool
+        for handler in handlers:
+            if pool is None:
+                result = handler.invoke(client_address, message)
+                if result is not None and results is not None:
+                    results.append(result)
+            else:
+                if self.ordered == 'route':
+                    key = message.address
+                elif self.ordered == 'sender':
+                    key = client_address
+                else:
+                    key = None
+                pool.submit(
+                    handler.invoke, client_address, message, key=key)
+
+    def map(self, address, handler, *args, needs_reply_address=False):
+        if address not in self._order:
+            self._order[address] = len(self._order)
+            if '*' in address:
+                self._insert_pattern(address)
+        r = super().map(
+            address, handler, *args, needs_reply_address=needs_reply_address)
+        self._invalidate()
+        return r
+
+    def unmap(self, address, handler, *args, needs_reply_address=False):
+        try:
+            super().unmap(
+                address, handler, *args,
+                needs_reply_address=needs_reply_address)
+        finally:
+            self._invalidate()
+
+    def set_default_handler(self, handler, needs_reply_address=False):
+        super().set_default_handler(handler, needs_reply_address)
+        self._invalidate()
+
+    def cache_info(self):
+        """hits, misses, maxsize and current size of the LRU cache"""
+        return self._resolve_cached.cache_info()
+
+    def handlers_for_address(self, address_pattern:str):
+        """
+        Args:
+            address_pattern: incoming OSC address
+
+        Returns:
+            tuple of Handlers matching address_pattern
+        """
+        return self._resolve_cached(address_pattern, self._generation)
+
+    def _invalidate(self):
+        # a lookup racing with this still caches under the old generation,
+        # so it can't be returned for the new mapping
+        self._generation += 1
+        self._resolve_cached.cache_clear()
+
+    def _insert_pattern(self, address:str):
+        # python-osc: `re.match(addr.replace("*", "[^/]*?/*"), address_pattern)`
+        compiled = re.compile(address.replace('*', '[^/]*?/*'))
+        *segments, partial = _literal_prefix(address).split('/')
+        node = self._trie
+        for seg in segments:
+            node = node.children.setdefault(seg, _TrieNode())
+        node.patterns.append((partial, compiled, address))
+
+    def _match_patterns(self, address:str):
+        """mapped wildcard addresses matching a literal incoming address"""
+        matched = []
+        node = self._trie
+        for seg in address.split('/'):
+            for partial, compiled, mapped in node.patterns:
+                if seg.startswith(partial) and compiled.match(address):
+                    matched.append(mapped)
+            node = node.children.get(seg)
+            if node is None:
+                break
+        return matched
+
+    def _resolve(self, address_pattern:str, generation:int):
+        if '*' in address_pattern or '?' in address_pattern:
+            # incoming address is itself a pattern:
+            # needs testing against every mapped address
+            return tuple(super().handlers_for_address(address_pattern))
+
+        matched = self._match_patterns(address_pattern)
+        if address_pattern in self._map:
+            matched.append(address_pattern)
+
+        if not matched:
+            if self._default_handler:
+                return (self._default_handler,)
+            return ()
+
+        # same order as python-osc: order in which addresses were mapped
+        order = self._order
+        matched.sort(key=lambda a: order.get(a, -1))
+        return tuple(h for a in matched for h in self._map[a])
+
+# attribute names of each MIDI message type
+_midi_value_names = {k: v['value_names'] for k, v in SPEC_BY_TYPE.items()}
+# attribute indexed along with port, type and channel
+_midi_number = {
+    k: next((n for n in ('note', 'control') if n in names), None)
+    for k, names in _midi_value_names.items()}
+# MIDI message type of each status byte (high nibble for channel messages)
+_midi_status_types = {v['status_byte']: k for k, v in SPEC_BY_TYPE.items()}
+# status bytes of channel messages whose first data byte is a note or control
+_midi_numbered = frozenset(
+    v['status_byte'] for k, v in SPEC_BY_TYPE.items() if _midi_number[k])
+
+class MIDIDispatcher:
+    """
+    finds the handlers for a MIDI message without testing every filter.
+
+    handlers are (filters, ...) tuples, with filters as made by `MIDI.handle`.
+    the handlers matching each (port, type, channel, note or control) are
+    found once and indexed; only filters on other attributes
+    (velocity, value, program) are left to test per message.
+    messages can be given as mido messages or as raw bytes.
+    the index is rebuilt when a handler is added.
+
+    like the filters in `MIDI.handle`, a filter on an attribute the
+    message doesn't have is ignored.
+    """
+    def __init__(self, max_keys:int=2**16):
+        """
+        Args:
+            max_keys: max number of index entries before it is rebuilt
+        """
+        self.handlers = []
+        self.max_keys = max_keys
+        self._index = {}
+
+    def add(self, handler:tuple):
+        """add a (filters, ...) tuple"""
+        self.handlers.append(handler)
+        self._index = {}
+
+    def handlers_for(self, port:str, msg) -> tuple:
+        """
+        Returns:
+            tuple of (remaining filters, handler) for handlers which may match,
+            in the order they were added. remaining filters are
+            (attribute, set of values, byte index) to test against `msg`
+            (as `getattr(msg, attribute)`, or `data[byte index]` of raw bytes).
+        """
+        t = msg.type
+        n = _midi_number.get(t)
+        return self._lookup((port, t, getattr(msg, 'channel', None),
+            None if n is None else getattr(msg, n)))
+
+    def handlers_for_raw(self, port:str, data) -> tuple:
+        """like `handlers_for`, for a message as raw bytes"""
+        status = data[0]
+        if status < 0xf0:
+            kind = status & 0xf0
+            channel = status & 0x0f
+        else:
+            kind = status
+            channel = None
+        return self._lookup((port, _midi_status_types.get(kind), channel,
+            data[1] if kind in _midi_numbered else None))
+
+    def _lookup(self, key):
+        # if a handler is added during `_resolve`, the result goes into
+        # the index it replaced
+        index = self._index
+        r = index.get(key)
+        if r is None:
+            r = self._resolve(key)
+            if len(index) >= self.max_keys:
+                index.clear()
+            index[key] = r
+        return r
+
+    def _resolve(self, key):
+        port, t, channel, number = key
+        names = _midi_value_names.get(t, ())
+        matched = []
+        for handler in self.handlers:
+            ok = True
+            residual = []
+            for k, filt in handler[0].items():
+                if filt is None:
+                    continue
+                if k == 'port':
+                    ok = port in filt
+                elif k == 'ignore_port':
+                    ok = port not in filt
+                elif k == 'type':
+                    ok = t in filt
+                elif k not in names:
+                    continue
+                elif k == 'channel':
+                    ok = channel in filt
+                elif k in ('note', 'control'):
+                    ok = number in filt
+                else:
+                    # data bytes follow the status byte in this order
+                    residual.append((k, filt, names.index(k)))
+                if not ok:
+                    break
+            if ok:
+                matched.append((tuple(residual), handler))
+        return tuple(matched)
@@ -0,0 +1,141 @@
+import time
+import atexit
+import traceback
+from threading import Thread, Lock
+
+class LogSink:
+    """
+    log records are stored unformatted in a preallocated ring buffer,
+    then formatted and written on a background thread. logging from a
+    realtime thread only costs taking a lock and storing a reference.
+
+    since formatting is deferred, arguments are formatted as they are
+    when flushed, not when logged.
+
+    when the buffer is full, new records are dropped and counted.
+    each category can be sampled, keeping one in every N records.
+    """
+    def __init__(self, size:int=4096, interval:float=0.05, write=None):
+        """
+        Args:
+            size: max number of records waiting to be written
+            interval: seconds between flushes
+            write: function to write each formatted line,
+                by default `print` (looked up when flushing, so redirecting
+                stdout still works)
+        """
+        self.size = size
+        self.interval = interval
+        self.write = write
+        self.records = [None]*size
+        self.head = 0 # total records stored
+        self.tail = 0 # total records written
+        self.lock = Lock()
+        # keeps concurrent flushes in order
+        self.flush_lock = Lock()
+        # category -> keep one in this many
+        self.sampling = {}
+        # category -> number of records seen
+        self.seen = {}
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+        self.thread = Thread(target=self._run, name='iipyper log', daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def sample(self, category:str, n:int):
+        """keep only one in every `n` records of `category` (1 to keep all)"""
+        self.sampling[category] = n
+
+    def log(self, category:str, fmt:str, *args):
+        """
+        store a record to be written later as `fmt.format(*args)`.
+
+        Args:
+            category: name used for sampling, e.g. 'osc.call'
+            fmt: format string
+            *args: arguments to format (see also `Truncated`)
+        """
+        with self.lock:
+            n = self.sampling.get(category)
+            if n is not None and n > 1:
+                seen = self.seen.get(category, 0)
+                self.seen[category] = seen + 1
+                if seen % n:
+                    self.sampled_out += 1
+                    return
+            i = self.head
+            if i - self.tail >= self.size:
+                self.dropped += 1
+                return
+            self.records[i % self.size] = (fmt, args)
+            self.head = i + 1
+
+    def flush(self):
+        """format and write everything logged so far"""
+        with self.flush_lock:
+            with self.lock:
+                head, tail = self.head, self.tail
+                batch = [self.records[i % self.size] for i in range(tail, head)]
+                for i in range(tail, head):
+                    self.records[i % self.size] = None
+                self.tail = head
+                dropped = self.dropped - self.reported_dropped
+                self.reported_dropped = self.dropped
+            write = self.write or print
+            for fmt, args in batch:
+                try:
+                    line = fmt.format(*args)
+                except Exception:
+                    line = f'{fmt} {args} (bad log format)'
+                write(line)
+            if dropped:
+                write(f'iipyper: log buffer full, {dropped} records dropped')
+            self.written += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            'waiting': self.head - self.tail,
+            'written': self.written,
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out,
+        }
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                traceback.print_exc()
+
+class Truncated:
+    """log argument which is shortened to `n` characters when formatted"""
+    __slots__ = ('obj', 'n')
+    def __init__(self, obj, n:int=None):
+        self.obj = obj
+        self.n = n
+
+    def __format__(self, spec):
+        s = str(self.obj)
+        if self.n is not None and len(s) > self.n:
+            s = s[:self.n-3]+'...'
+        return s
+
+_sink = None
+_sink_lock = Lock()
+
+def get_sink() -> LogSink:
+    """the shared iipyper `LogSink`, started on first use"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = LogSink()
+    return _sink
+
+def log(category:str, fmt:str, *args):
+    """log to the shared iipyper `LogSink`, see `LogSink.log`"""
+    (_sink or get_sink()).log(category, fmt, *args)
@@ -0,0 +1,112 @@
+import time
+import json
+from bisect import bisect_left
+
+# upper bounds of histogram buckets in seconds
+_bounds = (1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 1e-1, float('inf'))
+
+def _label(bound):
+    if bound == float('inf'):
+        return 'inf'
+    if bound < 1e-3:
+        return f'{round(bound*1e6)}us'
+    return f'{round(bound*1e3)}ms'
+
+_labels = tuple(_label(b) for b in _bounds)
+
+class Histogram:
+    """durations in fixed buckets from 10us to 100ms"""
+    __slots__ = ('counts', 'total', 'max')
+    def __init__(self):
+        self.counts = [0]*len(_bounds)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, dt:float):
+        self.counts[bisect_left(_bounds, dt)] += 1
+        self.total += dt
+        if dt > self.max:
+            self.max = dt
+
+    def snapshot(self) -> dict:
+        n = sum(self.counts)
+        return {
+            'count': n,
+            'mean': self.total / n if n else 0.0,
+            'max': self.max,
+            'buckets': {
+                label: c for label, c in zip(_labels, self.counts) if c},
+        }
+
+class RouteMetrics:
+    """counts and timings for one OSC route or MIDI handler"""
+    __slots__ = ('count', 'errors', 'replies', 'parse', 'lock_wait', 'handler')
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.replies = 0
+        self.parse = Histogram()
+        self.lock_wait = Histogram()
+        self.handler = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'replies': self.replies,
+            'parse': self.parse.snapshot(),
+            'lock_wait': self.lock_wait.snapshot(),
+            'handler': self.handler.snapshot(),
+        }
+
+class Metrics:
+    """
+    registry of `RouteMetrics` by name, which can be shared by `OSC` and
+    `MIDI` objects. counters are not locked, so they may undercount slightly
+    when handlers run concurrently.
+    """
+    def __init__(self):
+        self.routes = {}
+        self.started = time.time()
+
+    def route(self, name:str) -> RouteMetrics:
+        """get the metrics for `name`, creating them if needed"""
+        m = self.routes.get(name)
+        if m is None:
+            m = self.routes[name] = RouteMetrics()
+        return m
+
+    def snapshot(self) -> dict:
+        """all metrics as a dict of plain values"""
+        return {
+            'started': self.started,
+            'time': time.time(),
+            'routes': {k: m.snapshot() for k, m in list(self.routes.items())},
+        }
+
+    def json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    def reset(self):
+        self.routes = {}
+        self.started = time.time()
+
+def timed_call(m:RouteMetrics, lock, f, *a, **kw):
+    """
+    call `f`, holding `lock` if it's not None,
+    and record the lock wait and call time in `m`.
+    """
+    t0 = time.perf_counter()
+    if lock is None:
+        t1 = t0
+        try:
+            return f(*a, **kw)
+        finally:
+            m.handler.record(time.perf_counter() - t1)
+    with lock:
+        t1 = time.perf_counter()
+        m.lock_wait.record(t1 - t0)
+        try:
+            return f(*a, **kw)
+        finally:
+            m.handler.record(time.perf_counter() - t1)
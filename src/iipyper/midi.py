@@ -1,15 +1,18 @@
 import os
 import functools as ft
-from queue import Queue
 import time
 import traceback
-from collections import defaultdict
 from threading import Lock
+from collections import namedtuple
 
 import mido
-from mido.frozen import freeze_message
+import numpy as np
 
 from .state import _lock
+from .metrics import Metrics, timed_call
+from .log import log
+from .dispatch import MIDIDispatcher
+from .workers import KeyedQueues
 
 def _alias(item):
     if item=='cc':
@@ -24,6 +27,193 @@ def _get_filter(item):
         return set(_alias(i) for i in item)
     return {_alias(item)}
 
+def _feedback_key(data) -> int:
+    """
+    int key for the raw bytes of a MIDI message, for feedback suppression.
+    note on with velocity 0 is treated as a note off with velocity 0,
+    in case external hardware converts between them.
+    """
+    n = len(data)
+    if n == 3:
+        status = data[0]
+        if status & 0xf0 == 0x90 and data[2] == 0:
+            status ^= 0x10
+        return status << 16 | data[1] << 8 | data[2]
+    if n == 2:
+        return data[0] << 8 | data[1]
+    if n == 1:
+        return data[0]
+    # sysex: above any short message key
+    return hash(bytes(data)) & (2**60-1) | 2**60
+
+class FeedbackFilter:
+    """
+    recognizes MIDI messages arriving shortly after the same message was sent,
+    with fixed memory: a table of `slots` keys, each with a ring of the
+    last `depth` send times. each send suppresses at most one arrival.
+
+    keys are found by probing up to `probe` slots. a slot is reused when
+    all its send times have expired; if none is free, the slot with the
+    oldest send is evicted (counted in `stats`).
+    """
+    def __init__(self, window:float=1e-3, slots:int=1024, depth:int=4,
+            probe:int=8):
+        """
+        Args:
+            window: max delay in seconds to consider feedback
+            slots: number of distinct recent messages to remember
+                (rounded up to a power of 2)
+            depth: number of sends of the same message to remember
+            probe: number of slots to search for each key
+        """
+        self.window = int(window * 1e9)
+        self.size = 1 << max(0, slots-1).bit_length()
+        self.shift = 32 - (self.size.bit_length() - 1)
+        self.depth = depth
+        self.probe = min(probe, self.size)
+        self.keys = [-1]*self.size
+        # ring of send times for each slot
+        self.times = [0]*(self.size*depth)
+        self.start = [0]*self.size
+        self.count = [0]*self.size
+        # latest send time for each slot
+        self.latest = [0]*self.size
+        self.lock = Lock()
+        self.suppressed = 0
+        self.expired = 0
+        self.overwritten = 0
+        self.evicted = 0
+
+    def _home(self, key) -> int:
+        """first slot to probe for a key. takes the high bits of a
+        multiplicative hash, which depend on all bytes of the key
+        (the low bits would depend mostly on the last data byte)
+        """
+        return ((key * 0x9e3779b1) & 0xffffffff) >> self.shift
+
+    def _find(self, key):
+        mask = self.size - 1
+        i = self._home(key)
+        keys = self.keys
+        for j in range(self.probe):
+            slot = (i + j) & mask
+            if keys[slot] == key:
+                return slot
+        return None
+
+    def sent(self, data, t:int=None):
+        """record that the message with raw bytes `data` was sent at time `t`
+        (from `time.perf_counter_ns`, by default now)
+        """
+        key = _feedback_key(data)
+        if t is None:
+            t = time.perf_counter_ns()
+        with self.lock:
+            slot = self._find(key)
+            if slot is None:
+                slot = self._claim(key, t)
+            depth = self.depth
+            n = self.count[slot]
+            if n == depth:
+                # forget the oldest send
+                self.start[slot] = (self.start[slot] + 1) % depth
+                self.overwritten += 1
+                n -= 1
+            self.times[slot*depth + (self.start[slot] + n) % depth] = t
+            self.count[slot] = n + 1
+            self.latest[slot] = t
+
+    def _claim(self, key, t):
+        """a slot for a new key: free, expired or else the oldest"""
+        mask = self.size - 1
+        i = self._home(key)
+        keys, latest = self.keys, self.latest
+        oldest = None
+        for j in range(self.probe):
+            slot = (i + j) & mask
+            if keys[slot] == -1 or t - latest[slot] >= self.window:
+                break
+            if oldest is None or latest[slot] < latest[oldest]:
+                oldest = slot
+        else:
+            slot = oldest
+            self.evicted += 1
+        keys[slot] = key
+        self.start[slot] = 0
+        self.count[slot] = 0
+        return slot
+
+    def received(self, data, t:int=None) -> bool:
+        """
+        True if the message with raw bytes `data` received at time `t`
+        (from `time.perf_counter_ns`, by default now) is feedback.
+        expired send times of the message are discarded.
+        """
+        key = _feedback_key(data)
+        if t is None:
+            t = time.perf_counter_ns()
+        with self.lock:
+            slot = self._find(key)
+            if slot is None:
+                return False
+            depth = self.depth
+            start, n = self.start[slot], self.count[slot]
+            base = slot*depth
+            suppress = False
+            # oldest first
+            while n:
+                age = t - self.times[base + start]
+                start = (start + 1) % depth
+                n -= 1
+                if age < self.window:
+                    suppress = True
+                    break
+                self.expired += 1
+            if n:
+                self.start[slot], self.count[slot] = start, n
+            else:
+                # free the slot
+                self.keys[slot] = -1
+                self.count[slot] = 0
+            if suppress:
+                self.suppressed += 1
+            return suppress
+
+    def stats(self) -> dict:
+        return {
+            'keys': sum(k != -1 for k in self.keys),
+            'suppressed': self.suppressed,
+            'expired': self.expired,
+            'overwritten': self.overwritten,
+            'evicted': self.evicted,
+        }
+
+_dispatch_modes = ('callback', 'queued')
+
+# compact MIDI message for handlers with `raw=True` (see `MIDI.handle`)
+MIDIEvent = namedtuple('MIDIEvent', 'status channel data1 data2 time')
+MIDIEvent.__doc__ = """
+MIDI message as raw bytes:
+    status: status byte without the channel, e.g. 0x90 for note on,
+        0xb0 for control change, 0xf8 for clock
+    channel: 0-15, or None for system messages
+    data1: first data byte (e.g. note or control number), or 0.
+        for sysex, all the bytes of the message
+    data2: second data byte (e.g. velocity or value), or 0
+    time: arrival time in seconds, from `time.perf_counter`
+"""
+
+def _midi_event(data, t:float) -> MIDIEvent:
+    status = data[0]
+    if status < 0xf0:
+        return MIDIEvent(status & 0xf0, status & 0x0f,
+            data[1], data[2] if len(data) > 2 else 0, t)
+    if status == 0xf0:
+        return MIDIEvent(status, None, bytes(data), 0, t)
+    n = len(data)
+    return MIDIEvent(
+        status, None, data[1] if n > 1 else 0, data[2] if n > 2 else 0, t)
+
 class MIDI:
     """
     iipyper MIDI object.
@@ -57,8 +247,12 @@ class MIDI:
         virtual_in_ports:int=1, virtual_out_ports:int=1, 
         suppress_feedback:bool=True,
         suppress_feedback_window:float=1e-3,
+        suppress_feedback_slots:int=1024,
         # sleep_time:float=5e-4
         verbose:int=1, 
+        metrics:bool|Metrics=False,
+        dispatch:str='callback', workers:int=1, queue_size:int=1024,
+        raw_input:bool=False,
         ):
         """
         Args:
@@ -68,19 +262,47 @@ class MIDI:
             virtual_out_ports: number of 'From iipyper X' ports to create
             suppress_feedback: if True, ignore any MIDI message recently sent on an output port 
             suppress_feedback_window: max delay in seconds to consider feedback
+            suppress_feedback_slots: max number of distinct messages sent
+                within the window to remember (see `FeedbackFilter`)
+            metrics: if True, record counts and timings for each handler
+                (see `MIDI.metrics.snapshot()`). pass a `Metrics` to share
+                it with `OSC` objects.
+            dispatch: 'callback' to run handlers on the MIDI input thread,
+                or 'queued' to only timestamp and queue messages there,
+                and run handlers on worker threads, in order for each port.
+                a slow handler then doesn't hold up the MIDI driver
+                (see `MIDI.queue_stats()`).
+            workers: with 'queued' dispatch, number of worker threads.
+                each port is handled by one worker.
+            queue_size: with 'queued' dispatch, max number of messages
+                waiting per port. further messages are dropped and counted.
+            raw_input: if True, receive raw bytes from rtmidi instead of
+                mido messages. handlers with `raw=True` (see `MIDI.handle`)
+                then run without mido, and mido messages are only made
+                for other handlers which match.
         """
+        if dispatch not in _dispatch_modes:
+            raise ValueError(f'MIDI: dispatch should be one of {_dispatch_modes}')
         if not MIDI.ports_printed and verbose:
             MIDI.print_ports()
 
         self.running = False
 
         self.verbose = int(verbose)
+        if metrics is True:
+            metrics = Metrics()
+        self.metrics = metrics or None
         # self.sleep_time = sleep_time
-        # type -> list[Optional[set[port], Optional[set[channel]], function]
-        self.handlers = []
+        # list of (filters, function, RouteMetrics or None)
+        self.dispatcher = MIDIDispatcher()
+        self.handlers = self.dispatcher.handlers
 
         self.handler_docs = []
 
+        self.queues = None
+        if dispatch == 'queued':
+            self.queues = KeyedQueues(workers, queue_size, name='iipyper MIDI')
+
         if isinstance(in_ports, str):
             in_ports = in_ports.split(',')
         if isinstance(out_ports, str):
@@ -94,13 +316,13 @@ class MIDI:
 
         # MIDI feedback suppression stuff
         self.suppress_feedback = suppress_feedback
-        # map from MIDI event to list of timestamps
-        # self.recent_outputs = defaultdict(list)
-        self.recent_outputs = defaultdict(Queue)
-        self.max_feedback_ns = suppress_feedback_window * 1e9
+        # recent send times of raw MIDI messages
+        self.feedback = FeedbackFilter(
+            suppress_feedback_window, suppress_feedback_slots)
 
         self.lock = Lock()
 
+        self.raw_input = raw_input
         self.in_ports = {}  
         for port in in_ports:
             cb = self.get_callback(port)
@@ -118,10 +340,16 @@ class MIDI:
             except Exception: print(
                 f'WARNING: iipyper: failed to open virtual MIDI port {port}')
 
+        if raw_input:
+            for name, port in self.in_ports.items():
+                self._set_raw_callback(name, port)
+
         if self.verbose:
             print(f"""opened MIDI input ports: {list(self.in_ports)}""")
 
         self.out_ports = {}
+        # port name -> (port, lock, function sending raw bytes)
+        self._raw_senders = {}
         for i in range(virtual_out_ports):
             port = f'From iipyper {i+1}'
             try:
@@ -152,9 +380,15 @@ class MIDI:
         
         Decorated function receives the following arguments:
             `msg`: a [mido](https://mido.readthedocs.io/en/stable/messages/index.html) message
+                (or a `MIDIEvent` with `raw=True`)
             `port`: MIDI port name as a string (optional)
 
         Args:
+            raw: if True, the decorated function receives a `MIDIEvent`
+                tuple of (status, channel, data1, data2, time) instead of
+                a mido message. with `MIDI(raw_input=True)`, mido is
+                then not used at all for this handler.
+                note on with velocity 0 is not converted to note off.
             port: (collection of) MIDI ports to filter on (whitelist)
             ignore_port: (collection of) MIDI ports to filter on (blacklist)
             channel: (collection of) MIDI channels (0-index) to filter on
@@ -165,6 +399,7 @@ class MIDI:
             control: (collection of) MIDI cc numbers to filter on
             program: (collection of) MIDI program numbers to filter on
         """
+        raw = kw.pop('raw', False)
         if len(a):
             # bare decorator
             assert len(a)==1
@@ -186,7 +421,13 @@ class MIDI:
         def decorator(f):
             self.handler_docs.append((kw, f.__doc__))
 
-            self.handlers.append((filters, f))
+            metrics = None
+            if self.metrics is not None:
+                name = f'MIDI {f.__qualname__}'
+                if name in self.metrics.routes:
+                    name = f'{name} {len(self.handlers)}'
+                metrics = self.metrics.route(name)
+            self.dispatcher.add((filters, f, metrics, raw))
             return f
         
         return decorator if f is None else decorator(f)
@@ -203,108 +444,266 @@ class MIDI:
     def get_callback(self, port_name):
         if self.verbose>1: 
             print(f'create handler for MIDI port {port_name}')
-        def callback(msg):
-            if self.verbose > 1:
-                print(f'filtering MIDI {msg} port={port_name}')
-            if not self.running:
-                return
-
-            # NOTE: this should be fast, as it only processes current
-            # event;
-            # but this means that every unique MIDI event received remains in 
-            # storage if there is no feedback?
-            # for note events that's acceptable in most cases probably
-            # 128 * 16 * 128 is just in the 100k range
-            if self.suppress_feedback:
-                # freeze message so it can be a dict key
-                # m = freeze_message(msg)
-                m = self.msg_to_fbs_key(msg)
-                t = time.time_ns()
-                with self.lock:
-                    # get arrival times of the same message
-                    # creating empty list if none seen so far
-                    ts = self.recent_outputs[m]
-                    # while len(ts):
-                    while not ts.empty():
-                        # process oldest first
-                        # age = t - ts.pop(0)
-                        age = t - ts.get()
-                        # if one is recent enough, return from callback
-                        # anything older than threshold just gets dropped
-                        if age<self.max_feedback_ns:
-                            if self.verbose > 2:
-                                print(f'suppressing MIDI feedback {msg} {age=}')
-                            return
-                    
-            # check each handler 
-            for filters, f in self.handlers:
-                filters = filters.copy()
-                # print(port_name, f'{filters=}')
-                # check port
-                use_handler = (
-                    'port' not in filters 
-                    or port_name in filters.pop('port'))
-                # print(f"{ 'ignore_port' not in filters=}")
-                # print(f"{ port_name not in filters.pop('ignore_port')=}")
-                use_handler &= (
-                    'ignore_port' not in filters 
-                    or port_name not in filters.pop('ignore_port'))
-                # check other filters
-                use_handler &= all(
-                    filt is None 
-                    or not hasattr(msg, k)
-                    or getattr(msg, k) in filt
-                    for k,filt in filters.items())
-                # call the handler if it passes the filter
-                if not use_handler:
-                    continue
-                # if self.verbose>1: print(f'enter handler function {f} {msg=}', flush=True)
-                # f(msg) ### DEBUG
-                # if self.verbose>1: print(f'exit handler function {f}', flush=True)
-                with _lock:
-                    if self.verbose>1: print(f'enter handler function {f} {msg=}')
+        if self.queues is None:
+            def callback(msg):
+                self._dispatch(msg, port_name)
+        else:
+            queues = self.queues
+            def callback(msg):
+                queues.put(
+                    port_name, self._dispatch,
+                    msg, port_name, time.perf_counter_ns())
+        return callback
+
+    def _set_raw_callback(self, port_name, port):
+        """receive raw bytes directly from an rtmidi port"""
+        rt = getattr(port, '_rt', None)
+        if rt is None:
+            print(f'WARNING: iipyper: raw input not supported for {port_name}')
+            return
+        if self.queues is None:
+            def callback(msg_data, data):
+                t = time.perf_counter_ns()
+                self._dispatch_raw(msg_data[0], port_name, t)
+        else:
+            queues = self.queues
+            def callback(msg_data, data):
+                queues.put(
+                    port_name, self._dispatch_raw,
+                    msg_data[0], port_name, time.perf_counter_ns())
+        with port._callback_lock:
+            rt.cancel_callback()
+            rt.set_callback(callback)
+
+    def queue_stats(self) -> dict:
+        """
+        with 'queued' dispatch, for each input port: current and max depth,
+        messages enqueued, dropped, handled, and a histogram of time spent
+        waiting in the queue ('residency').
+        """
+        return {} if self.queues is None else self.queues.stats()
+
+    def _dispatch(self, msg, port_name, t:int=None):
+        """
+        run the handlers for a message
+
+        Args:
+            t: arrival time from `time.perf_counter_ns`, or None for now
+        """
+        if self.verbose > 1:
+            log('midi.filter', 'filtering MIDI {} port={}', msg, port_name)
+        if not self.running:
+            return
+
+        if self.suppress_feedback and self.feedback.received(msg.bytes(), t):
+            if self.verbose > 2:
+                log('midi.feedback', 'suppressing MIDI feedback {}', msg)
+            return
+
+        # look up handlers by port, type, channel and note/control,
+        # then check any other filters
+        if self.metrics is None:
+            handlers = self.dispatcher.handlers_for(port_name, msg)
+            dt = None
+        else:
+            t0 = time.perf_counter()
+            handlers = self.dispatcher.handlers_for(port_name, msg)
+            dt = time.perf_counter() - t0
+        event = None
+        for residual, (filters, f, metrics, raw) in handlers:
+            if residual and not all(
+                    getattr(msg, k) in filt for k, filt, _ in residual):
+                continue
+            if raw:
+                if event is None:
+                    event = _midi_event(msg.bytes(),
+                        time.perf_counter() if t is None else t*1e-9)
+                self._run_handler(f, metrics, dt, event, port_name)
+            else:
+                self._run_handler(f, metrics, dt, msg, port_name)
+
+    def _dispatch_raw(self, data, port_name, t:int):
+        """
+        run the handlers for a message received as raw bytes
+
+        Args:
+            t: arrival time from `time.perf_counter_ns`
+        """
+        if self.verbose > 1:
+            log('midi.filter', 'filtering MIDI {} port={}', data, port_name)
+        if not self.running:
+            return
+
+        if self.suppress_feedback and self.feedback.received(data, t):
+            if self.verbose > 2:
+                log('midi.feedback', 'suppressing MIDI feedback {}', data)
+            return
+
+        if self.metrics is None:
+            handlers = self.dispatcher.handlers_for_raw(port_name, data)
+            dt = None
+        else:
+            t0 = time.perf_counter()
+            handlers = self.dispatcher.handlers_for_raw(port_name, data)
+            dt = time.perf_counter() - t0
+        event = msg = None
+        for residual, (filters, f, metrics, raw) in handlers:
+            if residual and not all(
+                    data[i] in filt for k, filt, i in residual):
+                continue
+            if raw:
+                if event is None:
+                    event = _midi_event(data, t*1e-9)
+                self._run_handler(f, metrics, dt, event, port_name)
+            else:
+                # mido message only for handlers which need it
+                if msg is None:
                     try:
-                        f(msg, port_name)
-                    except TypeError:
-                        try:
-                            f(msg)
-                        except Exception:
-                            print(f'error in MIDI handler {f}:')
-                            traceback.print_exc()
-                    except Exception:
-                        print(f'error in MIDI handler {f}:')
-                        traceback.print_exc()
-                    if self.verbose>1: print(f'exit handler function {f}')
+                        msg = mido.Message.from_bytes(data)
+                    except ValueError:
+                        # not valid for mido, but raw handlers may still run
+                        msg = False
+                if msg is False:
+                    continue
+                self._run_handler(f, metrics, dt, msg, port_name)
+
+    def _run_handler(self, f, metrics, dt, msg, port_name):
+        """call a handler with the global lock, recording metrics
+        and errors in `queue_stats`"""
+        # if self.verbose>1: print(f'enter handler function {f} {msg=}', flush=True)
+        # f(msg) ### DEBUG
+        # if self.verbose>1: print(f'exit handler function {f}', flush=True)
+        if metrics is None:
+            with _lock:
+                ok = self._call_handler(f, msg, port_name)
+        else:
+            metrics.count += 1
+            metrics.parse.record(dt)
+            ok = timed_call(
+                metrics, _lock, self._call_handler, f, msg, port_name)
+            if not ok:
+                metrics.errors += 1
+        if not ok and self.queues is not None:
+            self.queues.error(port_name)
+
+    def _call_handler(self, f, msg, port_name) -> bool:
+        """call a handler with or without the port name.
+        returns False if it raised an exception
+        """
+        if self.verbose>1: 
+            log('midi.handler', 'enter handler function {} msg={}', f, msg)
+        try:
+            f(msg, port_name)
+        except TypeError:
+            try:
+                f(msg)
+            except Exception:
+                print(f'error in MIDI handler {f}:')
+                traceback.print_exc()
+                return False
+        except Exception:
+            print(f'error in MIDI handler {f}:')
+            traceback.print_exc()
+            return False
+        finally:
+            if self.verbose>1: 
+                log('midi.handler', 'exit handler function {}', f)
+        return True
 
-        return callback
-    
     def msg_to_fbs_key(self, msg):
-        # treat note on with velocity 0 as a note off
-        # for purposes of feedback suppression,
-        # in case external hardware converts between them
-        if msg.type == 'note_on' and msg.velocity == 0:
-            msg = mido.Message(
-                type='note_off', channel=msg.channel, note=msg.note, 
-                time=0, velocity=0)
-        return freeze_message(msg)
+        """key of a message for feedback suppression"""
+        return _feedback_key(msg.bytes())
 
     def _send_msg(self, port, m):
         """send on a specific port or all output ports"""
         ports = self.out_ports.values() if port is None else [self.out_ports[port]]
         # print(ports)
-        t = time.time_ns()
-        # m = freeze_message(m)
+        t = time.perf_counter_ns()
+        data = m.bytes() if self.suppress_feedback else None
         for p in ports:
             # print('iipyper send', m)
             # iiuc mido send should already be thread safe
             # with _lock:
             p.send(m)
             if self.suppress_feedback:
-                with self.lock:
-                    # self.recent_outputs[self.msg_to_fbs_key(m)].append(t)
-                    self.recent_outputs[self.msg_to_fbs_key(m)].put(t)
-                    # self.recent_outputs[m].append(t)
+                self.feedback.sent(data, t)
+
+    def _raw_sender(self, port):
+        """lock and function to send raw bytes on an output port,
+        directly to rtmidi if possible
+        """
+        p = self.out_ports[port]
+        cached = self._raw_senders.get(port)
+        if cached is not None and cached[0] is p:
+            return cached[1:]
+        rt = getattr(p, '_rt', None)
+        if rt is None:
+            # not an rtmidi port
+            send = lambda data: p.send(mido.Message.from_bytes(data))
+        else:
+            send = rt.send_message
+        lock = getattr(p, '_send_lock', None) or Lock()
+        self._raw_senders[port] = (p, lock, send)
+        return lock, send
+
+    def send_raw(self, data, port:str|None=None):
+        """
+        send one MIDI message as raw bytes, without making a mido message.
+        the bytes are not checked.
 
+        ```python
+        midi.send_raw((0x90, 60, 100)) # note on, channel 0, note 60
+        ```
+
+        Args:
+            data: status and data bytes, as bytes or a sequence of ints
+            port: the MIDI port to send on
+                (or sends on all open ports if not specified)
+        """
+        if isinstance(data, np.ndarray):
+            data = data.tolist()
+        t = time.perf_counter_ns()
+        for name in (self.out_ports if port is None else (port,)):
+            lock, send = self._raw_sender(name)
+            with lock:
+                send(data)
+            if self.suppress_feedback:
+                self.feedback.sent(data, t)
+
+    def send_batch(self, events, port:str|None=None):
+        """
+        send many MIDI messages as raw bytes, e.g. a chord or a CC sweep,
+        without making mido messages. the bytes are not checked.
+
+        ```python
+        # C major chord on channel 0
+        midi.send_batch([(0x90, 60, 100), (0x90, 64, 100), (0x90, 67, 100)])
+        # CC 1 sweep on channel 2
+        sweep = np.zeros((128, 3), np.uint8)
+        sweep[:, 0] = 0xb2
+        sweep[:, 1] = 1
+        sweep[:, 2] = np.arange(128)
+        midi.send_batch(sweep)
+        ```
+
+        Args:
+            events: sequence of messages as bytes or sequences of ints,
+                or a 2D numpy array with a row per message
+            port: the MIDI port to send on
+                (or sends on all open ports if not specified)
+        """
+        if isinstance(events, np.ndarray):
+            events = events.tolist()
+        t = time.perf_counter_ns()
+        for name in (self.out_ports if port is None else (port,)):
+            lock, send = self._raw_sender(name)
+            with lock:
+                for data in events:
+                    send(data)
+            if self.suppress_feedback:
+                sent = self.feedback.sent
+                for data in events:
+                    sent(data, t)
 
     # # see https://mido.readthedocs.io/en/latest/message_types.html
 
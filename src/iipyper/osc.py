@@ -1,20 +1,37 @@
 import time
 import json
+import functools as ft
 import pickle
 import inspect
 import typing
-from threading import Thread
+import asyncio
+import struct
+import traceback
+import itertools as it
+import socket
+from threading import Thread, Lock, local
+from collections import namedtuple, OrderedDict
 
 # from pythonosc import osc_packet
 # from pythonosc.osc_server import AsyncIOOSCUDPServer
-from pythonosc.osc_server import BlockingOSCUDPServer, ThreadingOSCUDPServer
-from pythonosc.dispatcher import Dispatcher
-from pythonosc.udp_client import SimpleUDPClient
+from pythonosc.osc_server import BlockingOSCUDPServer
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.parsing import osc_types
 
 import pydantic
 
 from .types import *
+from .types import _ndarray_annotation
 from .util import maybe_lock
+from .state import _get_loop, _lock
+from .timing import Scheduler
+from .dispatch import OSCDispatcher
+from .decode import decode_packet
+from .workers import WorkerPool, Lanes
+from .clients import UDPSocketPool, PooledUDPClient, ClientCache, AsyncSender
+from .receiver import UDPReceiver, set_rcvbuf, udp_socket_info
+from .metrics import Metrics, timed_call
+from .log import log, Truncated
 
 # leaving this here for now. seems like it may not be useful since nested bundles
 # do not appear to work in sclang.
@@ -84,6 +101,73 @@ def _is_legacy_json_str(item):
     else:
         return item, False
 
+def _is_splat(cls) -> bool:
+    return hasattr(cls, '__name__') and cls.__name__=='Splat'
+
+def _convert_any(hd:Any) -> Any:
+    """single item annotated with any type other than object or NDArray"""
+    if isinstance(hd, str) and hd.startswith('%JSON:'):
+        return json.loads(hd[6:])
+    return hd
+
+def _convert_object(hd:Any) -> Any:
+    """single item annotated as object"""
+    hd, _ = _is_legacy_json_str(hd)
+    # interpret object-anotated strings as JSON
+    if isinstance(hd, str):
+        hd = json.loads(hd)
+    # interpret object-annotated blobs as pickled objects
+    elif isinstance(hd, bytes):
+        # pickle
+        hd = pickle.loads(hd)
+    return hd
+
+def _ndarray_converter(dtype=None, shape=None):
+    """get the function which converts a single item annotated as an array,
+    casting to `dtype` if given, and checking `shape` (a `Shape`) if given
+    """
+    raw_dtype = np.float32 if dtype is None else dtype
+    def _convert_ndarray(hd:Any) -> Any:
+        """single item annotated as NDArray"""
+        hd = _convert_any(hd)
+        # interpret NDArrray-anotated strings as iipyper JSON or numpy repr format
+        if isinstance(hd, str):
+            if hd.startswith('array'):
+                hd = ndarray_from_repr(hd)
+            else:
+                hd = ndarray_from_json(hd)
+        # interpret NDArray-annotated blobs with a header as iipyper binary format,
+        # and others as raw buffers of the annotated dtype (default float32)
+        elif isinstance(hd, bytes):
+            if is_ndarray_blob(hd):
+                hd = ndarray_from_blob(hd)
+            else:
+                hd = np.frombuffer(hd, dtype=raw_dtype)
+                return hd if shape is None else shape.check(hd)
+        else:
+            return hd
+        if shape is not None:
+            shape.check(hd)
+        # only copy if the sender's dtype differs from the annotation
+        if dtype is not None and hd.dtype != dtype:
+            hd = hd.astype(dtype)
+        return hd
+    return _convert_ndarray
+
+_convert_ndarray = _ndarray_converter()
+
+def _item_converter(cls:type):
+    """get the function which converts a single OSC item for annotation `cls`"""
+    if cls is object:
+        return _convert_object
+    if cls is NDArray:
+        return _convert_ndarray
+    array = _ndarray_annotation(cls)
+    if array is not None:
+        dtype, _, shape = array
+        return _ndarray_converter(dtype, shape)
+    return _convert_any
+
 def _consume_items(hd:Any, tl:Iterable, cls:type, is_key) -> Tuple[Any, Any]:
     """
     Args:
@@ -98,37 +182,18 @@ def _consume_items(hd:Any, tl:Iterable, cls:type, is_key) -> Tuple[Any, Any]:
     # print(f'{hd=}, {tl=}, {cls=}')
 
     # consume groups of items annotated as Vector
-    if hasattr(cls, '__name__') and cls.__name__=='Splat':
+    if _is_splat(cls):
         return _consume_splat(hd, tl, cls, is_key)
-    
-    hd, is_legacy_json = _is_legacy_json_str(hd)
-
-    if cls is object or is_legacy_json:
-        # interpret object-anotated strings as JSON
-        if isinstance(hd, str):
-            hd = json.loads(hd)
-        # interpret object-annotated blobs as pickled objects
-        elif isinstance(hd, bytes):
-            # pickle
-            hd = pickle.loads(hd)
-
-    if cls is NDArray:
-        # interpret NDArrray-anotated strings as iipyper JSON or numpy repr format
-        if isinstance(hd, str):
-            if hd.startswith('array'):
-                hd = ndarray_from_repr(hd)
-            else:
-                hd = ndarray_from_json(hd)
-        # interpret NDArray-annotated blobs as raw float32 buffers
-        elif isinstance(hd, bytes):
-            hd = np.frombuffer(hd, dtype=np.float32)
 
     #single item case: return the head, advance to first element of tail
-    return hd, next(tl, _eos)
+    return _item_converter(cls)(hd), next(tl, _eos)
 
 def _parse_osc_items(osc_items, sig_info, allow_pos, allow_kw, verbose) -> Tuple[List, Dict[str, Any]]:
     """
     convert a list of osc message contents to positional and keyword arguments
+
+    this interprets the signature on every call; `OSC.handle` uses the
+    equivalent, precompiled `_OSCParser` instead.
     """
     positional_params, named_params, has_varp, has_varkw = sig_info
 
@@ -231,6 +296,779 @@ def _parse_osc_items(osc_items, sig_info, allow_pos, allow_kw, verbose) -> Tuple
     return args, kw
 
 
+def _signature_info(sig:inspect.Signature):
+    """
+    get info for parsing OSC out of the signature of an OSC handler function
+
+    Returns:
+        (positional_params, named_params, has_varp, has_varkw),
+        all_default: True if no parameter requires a positional value
+    """
+    positional_params = []
+    named_params = {}
+    has_varp = False
+    has_varkw = False
+    all_default = True
+    pos = True
+    for i,(name,p) in enumerate(sig.parameters.items()):
+        if i==0:
+            # skip first argument (the OSC route)
+            continue
+        # print(p, p.kind)
+        
+        if p.kind == p.VAR_POSITIONAL:
+            pos = False # no more positional args after variadic
+            all_default = False
+        elif p.kind == p.VAR_KEYWORD:
+            pos = False # no more positional args after variadic
+        else:
+            if p.default == p.empty:
+                all_default = False
+            named_params[name] = p
+            if pos:
+                positional_params.append(p)
+        has_varp |= p.kind==p.VAR_POSITIONAL
+        has_varkw |= p.kind==p.VAR_KEYWORD
+    return (positional_params, named_params, has_varp, has_varkw), all_default
+
+class _OSCParser:
+    """
+    an OSC handler signature precompiled into a parser for OSC message items.
+
+    `OSC.handle` builds one of these per route when decorating a function,
+    and calls it for every incoming message. produces the same result as
+    `_parse_osc_items`, but annotation lookups, Splat detection and the
+    keyword test are resolved once up front. handlers without Splat or ** 
+    arguments skip the key search entirely unless an item names an argument.
+    """
+    def __init__(self, sig_info, allow_pos, allow_kw):
+        """
+        Args:
+            sig_info: (positional_params, named_params, has_varp, has_varkw)
+            allow_pos: parse positional arguments
+            allow_kw: parse key, value pairs as named arguments
+        """
+        positional_params, named_params, has_varp, has_varkw = sig_info
+        self.sig_info = sig_info
+        self.allow_pos = allow_pos
+        self.allow_kw = allow_kw
+        self.has_varp = has_varp
+        self.has_varkw = has_varkw
+        self.n_pos = len(positional_params)
+        self.keys = frozenset(named_params)
+        self.start = 0 if self.n_pos or has_varp else -1
+
+        # (Splat length, item converter) for each parameter
+        self.pos_consumers = [
+            _OSCParser._consumer(p.annotation) for p in positional_params]
+        self.named_consumers = {
+            k:_OSCParser._consumer(p.annotation) 
+            for k,p in named_params.items()}
+        self.any_consumer = _OSCParser._consumer(Any)
+        # positional items which need more than the legacy JSON check
+        self.special_convs = [
+            (i,conv) for i,(_,conv) in enumerate(self.pos_consumers)
+            if conv is not _convert_any]
+        self.special_idx = {i for i,_ in self.special_convs}
+
+        # positions where Splat[None] is an error
+        self.bad_splat = set() if allow_kw else {
+            i for i,p in enumerate(positional_params[:-1]) 
+            if p.annotation is Splat[None]}
+
+        has_splat = any(n!=-1 for n,_ in self.pos_consumers)
+        # can every message be parsed as positional arguments?
+        self.positional = allow_pos and not has_varkw and not has_splat
+        # if so, does an item need checking against argument names?
+        self.check_keys = allow_kw and len(self.keys) > 0
+
+    @staticmethod
+    def _consumer(cls):
+        """
+        Returns:
+            length of Splat (-1 if not a Splat, None for Splat[None]),
+            converter for single items
+        """
+        if _is_splat(cls):
+            params = typing.get_args(cls.__supertype__)
+            return (len(params) or None), None
+        return -1, _item_converter(cls)
+
+    def __call__(self, osc_items, verbose=0) -> Tuple[List, Dict[str, Any]]:
+        """
+        convert a list of osc message contents to positional and keyword arguments
+        """
+        if verbose > 1:
+            print(f"""parsing OSC
+            {osc_items=}
+            {self.sig_info=}""")
+
+        if self.positional and not (
+                self.check_keys and self._has_key(osc_items)):
+            args, kw = self._parse_positional(osc_items)
+        else:
+            args, kw = self._parse_generic(osc_items)
+
+        if verbose > 2:
+            print(f"""parsed
+                {args=} 
+                {kw=}""")
+        return args, kw
+
+    def _has_key(self, osc_items) -> bool:
+        if str not in map(type, osc_items):
+            return False
+        keys = self.keys
+        return any(isinstance(item, str) and item in keys for item in osc_items)
+
+    def _is_key(self, item, position) -> bool:
+        # decide if an item represents the name of an argument,
+        # or is a positional argument or part of a Splat[None]
+        return (
+            self.allow_kw # named arguments enabled
+            and isinstance(item, str) # can be a name
+            and (item in self.keys # is a known name
+                or (self.has_varkw and position<0) # or must be a ** arg
+                or not self.allow_pos) 
+        )
+
+    def _parse_positional(self, osc_items) -> Tuple[List, Dict[str, Any]]:
+        n = len(osc_items)
+        if n > self.n_pos and not self.has_varp:
+            raise ValueError("""
+            too many positional arguments.
+            """)
+        args = list(osc_items)
+        # object and NDArray annotations
+        for i, conv in self.special_convs:
+            if i < n:
+                args[i] = conv(args[i])
+        # legacy JSON strings anywhere else
+        if str in map(type, osc_items):
+            for i in range(n):
+                if i not in self.special_idx:
+                    args[i] = _convert_any(args[i])
+        return args, {}
+
+    def _consume(self, hd, tl, consumer, position) -> Tuple[Any, Any]:
+        """like `_consume_items`, with a precompiled consumer"""
+        n, conv = consumer
+        if n == -1:
+            return conv(hd), next(tl, _eos)
+        splat_items = []
+        if n is None:
+            # Splat[None] case
+            # read until a string or end of iteration is encountered
+            while hd is not _eos and not self._is_key(hd, position):
+                splat_items.append(hd)
+                hd = next(tl, _eos)
+        else:
+            # Splat[N] case
+            # read the annotated number of items
+            for _ in range(n):
+                if hd is _eos:
+                    raise ValueError(f"""
+                    hit end of arguments while parsing Splat[{n}]
+                    """)
+                splat_items.append(hd)
+                hd = next(tl, _eos)
+        return splat_items, hd
+
+    def _parse_generic(self, osc_items) -> Tuple[List, Dict[str, Any]]:
+        position = self.start
+        items = iter(osc_items)
+        args = []
+        kw = {}
+        try:
+            item = next(items, _eos)
+            while item is not _eos:
+                if self._is_key(item, position):
+                    ### interpret this item as the name of an argument
+                    key = item
+                    consumer = self.named_consumers.get(key, self.any_consumer)
+                    try:
+                        value, item = self._consume(
+                            next(items), items, consumer, position)
+                    except json.JSONDecodeError:
+                        print(f'JSON error decoding argument "{key}"')
+                        raise
+                    kw[key] = value
+                    position = -1 # no more positional arguments allowed
+                elif position>=0:
+                    ### interpret this item as a positional argument
+                    if position < self.n_pos:
+                        consumer = self.pos_consumers[position]
+                    elif self.has_varp:
+                        consumer = self.any_consumer
+                    else:
+                        raise ValueError("""
+                        too many positional arguments.
+                        """)
+                    if position in self.bad_splat:
+                        raise ValueError("""
+                        Splat[None] can only be used on the last argument when kwargs=False.
+                        """)
+                    try:
+                        value, item = self._consume(
+                            item, items, consumer, position)
+                    except json.JSONDecodeError:
+                        print('JSON error decoding argument', position)
+                        raise
+                    args.append(value)
+                    position += 1
+                    # check if this was the final positional argument
+                    if position >= self.n_pos and not self.has_varp:
+                        position = -1
+                else:
+                    raise ValueError(f"""
+                    positional argument after keyword arg while parsing OSC.
+                    parsing: {osc_items}
+                    positional arguments parsed: {args}
+                    keyword arguments parsed: {kw}
+                    failed on item: {item}
+                    """)
+        except StopIteration:
+            pass
+        return args, kw
+
+
+_validation_modes = ('off', 'fast', 'strict')
+_backends = ('thread', 'asyncio', 'native')
+_send_modes = ('sync', 'async')
+_decoders = ('python-osc', 'fast')
+
+class _CoercionError(ValueError):
+    """failure of 'fast' validation of OSC handler arguments"""
+
+def _to_int(x):
+    """int, whole-number float or int string to int"""
+    if isinstance(x, int):
+        return int(x)
+    if isinstance(x, float):
+        if x.is_integer():
+            return int(x)
+    elif isinstance(x, str):
+        return int(x)
+    raise _CoercionError(f'expected an integer, got {x!r}')
+
+def _to_float(x):
+    """int or float to float"""
+    if isinstance(x, (int, float)):
+        return float(x)
+    raise _CoercionError(f'expected a number, got {x!r}')
+
+def _to_str(x):
+    if isinstance(x, str):
+        return x
+    raise _CoercionError(f'expected a string, got {x!r}')
+
+def _to_bool(x):
+    """bool, 0 or 1 to bool"""
+    if isinstance(x, (int, float)) and x in (0, 1):
+        return bool(x)
+    raise _CoercionError(f'expected a bool, 0 or 1, got {x!r}')
+
+_scalar_coercers = {int: _to_int, float: _to_float, str: _to_str, bool: _to_bool}
+
+def _coercer(cls):
+    """get a cheap conversion function for annotation `cls`, 
+    or None if values should be passed through unchanged.
+    """
+    if _is_splat(cls):
+        return list if cls is Splat[None] else tuple
+    if cls is NDArray:
+        return np.asarray
+    array = _ndarray_annotation(cls)
+    if array is not None:
+        dtype, ndim, shape = array
+        def coerce(a):
+            a = np.asarray(a, dtype=dtype)
+            if shape is not None:
+                if not shape.matches(a.shape):
+                    raise _CoercionError(
+                        f'expected array of shape {shape}, got {a.shape}')
+            elif ndim is not None and a.ndim != ndim:
+                raise _CoercionError(
+                    f'expected {ndim}-dimensional array, got shape {a.shape}')
+            return a
+        return coerce
+    for t, coerce in _scalar_coercers.items():
+        if cls is t:
+            return coerce
+    return None
+
+def _fast_validate(f, sig):
+    """
+    wrap `f` to coerce arguments using its annotations.
+
+    this is the 'fast' validation mode for `OSC.handle`:
+    int, float, str, bool, NDArray and Splat annotations are converted 
+    directly, anything else is passed through unchecked.
+    """
+    (positional_params, named_params, _, _), _ = _signature_info(sig)
+    pos_coercers = [_coercer(p.annotation) for p in positional_params]
+    named_coercers = {
+        k:_coercer(p.annotation) for k,p in named_params.items()}
+    var_coercer = varkw_coercer = None
+    for p in sig.parameters.values():
+        if p.kind == p.VAR_POSITIONAL:
+            var_coercer = _coercer(p.annotation)
+        elif p.kind == p.VAR_KEYWORD:
+            varkw_coercer = _coercer(p.annotation)
+
+    n_pos = len(pos_coercers)
+    pos_coercers = [(i,c) for i,c in enumerate(pos_coercers) if c is not None]
+    if not (pos_coercers or var_coercer or varkw_coercer
+            or any(named_coercers.values())):
+        # nothing to check
+        return f
+
+    @ft.wraps(f)
+    def validated(address, *args, **kw):
+        args = list(args)
+        try:
+            for i,c in pos_coercers:
+                if i < len(args):
+                    args[i] = c(args[i])
+            if var_coercer is not None:
+                for i in range(n_pos, len(args)):
+                    args[i] = var_coercer(args[i])
+            for k,v in kw.items():
+                c = (named_coercers[k] 
+                    if k in named_coercers else varkw_coercer)
+                if c is not None:
+                    kw[k] = c(v)
+        except (ValueError, TypeError) as e:
+            raise _CoercionError(f'{args} {kw}\n\t{e}') from e
+        return f(address, *args, **kw)
+    return validated
+
+def _host_port(s:str) -> Optional[Tuple[str, int]]:
+    """parse 'host:port', or return None"""
+    host, sep, port = s.rpartition(':')
+    if not (host and sep) or '/' in host:
+        return None
+    try:
+        return host, int(port)
+    except ValueError:
+        return None
+
+# anything with a `dgram` can be sent by a python-osc client
+_Datagram = namedtuple('_Datagram', 'dgram')
+
+def _encode_items(msg:Iterable) -> Iterable:
+    """encode any numpy arrays in an outgoing message as iipyper binary blobs,
+    which NDArray-annotated handlers decode (see `iipyper.ndarray_to_blob`)
+    """
+    if any(isinstance(item, np.ndarray) for item in msg):
+        return [
+            ndarray_to_blob(item) if isinstance(item, np.ndarray) else item
+            for item in msg]
+    return msg
+
+def _build_message(route:str, msg:Iterable) -> bytes:
+    builder = OscMessageBuilder(address=route)
+    for item in msg:
+        builder.add_arg(item)
+    return builder.build().dgram
+
+def _pack_bundles(dgrams:List[bytes], timetag:bytes, mtu:int) -> List[bytes]:
+    """pack OSC messages into as few bundles of at most `mtu` bytes as possible.
+    a message too big to share a bundle gets a bundle to itself.
+    """
+    header = b'#bundle\x00' + timetag
+    bundles = []
+    parts = [header]
+    size = len(header)
+    for d in dgrams:
+        n = 4 + len(d)
+        if size + n > mtu and len(parts) > 1:
+            bundles.append(b''.join(parts))
+            parts = [header]
+            size = len(header)
+        parts.append(struct.pack('>i', len(d)))
+        parts.append(d)
+        size += n
+    if len(parts) > 1:
+        bundles.append(b''.join(parts))
+    return bundles
+
+# stack of open _Bundles for each thread
+_bundles = local()
+
+def _current_bundle():
+    stack = getattr(_bundles, 'stack', None)
+    return stack[-1] if stack else None
+
+class _Bundle:
+    """
+    context manager collecting OSC messages sent on the current thread,
+    which are sent as bundles on exit. see `OSC.bundle`.
+    """
+    def __init__(self, client:str=None, timetag:float=None, mtu:int=None):
+        self.client = client
+        self.timetag = timetag
+        self.mtu = mtu
+        # (OSC, python-osc client) -> list of message datagrams
+        self.messages = {}
+
+    def add(self, osc, client, dgram:bytes):
+        self.messages.setdefault((osc, client), []).append(dgram)
+
+    def __enter__(self):
+        if getattr(_bundles, 'stack', None) is None:
+            _bundles.stack = []
+        _bundles.stack.append(self)
+        return self
+
+    def __exit__(self, *a):
+        _bundles.stack.remove(self)
+        self.flush()
+
+    def flush(self):
+        """send everything collected so far"""
+        messages, self.messages = self.messages, {}
+        timetag = osc_types.write_date(
+            osc_types.IMMEDIATELY if self.timetag is None else self.timetag)
+        for (osc, client), dgrams in messages.items():
+            if len(dgrams)==1 and self.timetag is None:
+                # lone message doesn't need a bundle
+                osc._send(client, None, dgrams[0])
+                continue
+            for data in _pack_bundles(dgrams, timetag, self.mtu or osc.mtu):
+                osc._send(client, None, data)
+
+# struct formats of typetags with fixed-size arguments (T, F, N have none)
+_template_formats = {
+    'i': 'i', 'f': 'f', 'd': 'd', 'h': 'q', 'T': '', 'F': '', 'N': ''}
+
+def _template_encoder(tag:str):
+    """function encoding one argument of a variable-size typetag"""
+    if tag == 's':
+        return osc_types.write_string
+    if tag == 'b':
+        return lambda b: osc_types.write_blob(
+            ndarray_to_blob(b) if isinstance(b, np.ndarray) else b)
+    return struct.Struct('>'+_template_formats[tag]).pack
+
+class OSCTemplate:
+    """
+    OSC message with a fixed route and typetags, for sending repeatedly.
+    the address and typetags are encoded once, and when all typetags have a
+    fixed size, arguments are packed into a reusable buffer.
+    see `OSC.template`.
+    """
+    def __init__(self, osc, route:str, typetags:str, client:str=None):
+        if not route.startswith('/'):
+            route = '/'+route
+        typetags = typetags.lstrip(',')
+        for tag in typetags:
+            if tag not in _template_formats and tag not in 'sb':
+                raise ValueError(
+                    f'OSCTemplate: unsupported typetag "{tag}" in "{typetags}"')
+        self.osc = osc
+        self.route = route
+        self.typetags = typetags
+        self.client = client
+        self.prefix = (
+            osc_types.write_string(route) + osc_types.write_string(','+typetags))
+        self.lock = Lock()
+        if all(tag in _template_formats for tag in typetags):
+            self.struct = struct.Struct(
+                '>'+''.join(_template_formats[tag] for tag in typetags))
+            self.buffer = bytearray(self.prefix) + bytearray(self.struct.size)
+            self.encoders = None
+        else:
+            self.struct = self.buffer = None
+            # T, F and N take no argument
+            self.encoders = [
+                _template_encoder(tag) for tag in typetags if tag not in 'TFN']
+
+    def _pack(self, args):
+        """encode a message, in the shared buffer if possible"""
+        if self.struct is None:
+            if len(args) != len(self.encoders):
+                raise ValueError(
+                    f'OSCTemplate: {self.route} ,{self.typetags} takes '
+                    f'{len(self.encoders)} arguments, got {len(args)}')
+            return self.prefix + b''.join(
+                enc(a) for enc, a in zip(self.encoders, args))
+        self.struct.pack_into(self.buffer, len(self.prefix), *args)
+        return self.buffer
+
+    def encode(self, *args) -> bytes:
+        """the OSC message datagram for `args`"""
+        with self.lock:
+            return bytes(self._pack(args))
+
+    def send(self, *args, client:Optional[str]=None):
+        """
+        send a message with arguments `args`, like `OSC.send`.
+
+        Args:
+            *args: one per typetag, except T, F and N.
+            client: name of OSC client, or None to use the template's client,
+                else the default client.
+        """
+        osc = self.osc
+        client = self.client if client is None else client
+        bundle = _current_bundle()
+        if client is None and bundle is not None:
+            client = bundle.client
+        if client is not None:
+            client = osc.get_client_by_name(client)
+        elif osc.clients:
+            client = next(iter(osc.clients.values()))
+        if client is None:
+            print(f'OSC message failed to send, could not determine client')
+            return
+
+        if bundle is not None:
+            bundle.add(osc, client, self.encode(*args))
+        elif osc.sender is not None:
+            osc.sender.put(
+                (client, None, self.encode(*args)), key=(client, self.route))
+        else:
+            with self.lock:
+                osc._send_dgram(client, self._pack(args))
+        if osc.verbose > 0:
+            log('osc.send', 'OSC message sent {}:{}', self.route, args)
+
+# OSC address of fragments of datagrams too large to send whole.
+# arguments are: message id (int), index (int), count (int), data (blob)
+_fragment_route = '/iipyper/fragment'
+_fragment_prefix = b'/iipyper/fragment\x00\x00\x00,iiib\x00\x00\x00'
+# prefix, 3 ints, blob size and up to 3 bytes of padding
+_fragment_overhead = len(_fragment_prefix) + 16 + 3
+
+def _fragments(dgram:bytes, msg_id:int, size:int) -> List[bytes]:
+    """split an OSC datagram into fragment messages of at most `size` bytes"""
+    chunk = size - _fragment_overhead
+    if chunk <= 0:
+        raise ValueError(
+            f'fragment size should be more than {_fragment_overhead} bytes')
+    count = -(-len(dgram) // chunk)
+    frags = []
+    for i in range(count):
+        data = dgram[i*chunk:(i+1)*chunk]
+        frags.append(b''.join((
+            _fragment_prefix,
+            struct.pack('>iiii', msg_id, i, count, len(data)),
+            data, 
+            b'\x00' * (-len(data) % 4))))
+    return frags
+
+class FragmentReassembler:
+    """
+    reassembles datagrams split into fragments by an `OSC` with `fragment_size`.
+
+    incomplete messages are discarded when they are older than `timeout`, 
+    or when the fragments held would exceed `max_bytes` (oldest first).
+    each fragment held is charged `overhead` bytes on top of its data,
+    and nothing is allocated for fragments not yet received,
+    so memory stays bounded whatever fragment counts senders claim.
+    fragments of messages which were already completed or discarded 
+    are ignored as stale.
+    """
+    def __init__(self, timeout:float=1.0, max_bytes:int=2**26, history:int=1024,
+            overhead:int=64):
+        """
+        Args:
+            timeout: seconds to wait for all fragments of a message
+            max_bytes: max total size of fragments held
+            overhead: bytes charged per fragment held, besides its data
+            history: number of finished message ids to remember,
+                for discarding stale fragments
+        """
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.history = history
+        self.lock = Lock()
+        # key -> [deadline, fragment count, {index: data}]
+        self.pending = OrderedDict()
+        # keys of messages completed or discarded recently
+        self.finished = OrderedDict()
+        self.pending_bytes = 0
+        self.overhead = overhead
+        self.completed = 0
+        self.timed_out = 0
+        self.evicted = 0
+        self.stale = 0
+        self.invalid = 0
+
+    def add(self, key, index:int, count:int, data:bytes) -> Optional[bytes]:
+        """
+        Args:
+            key: identifies the message, e.g. (sender address, message id)
+            index: position of this fragment
+            count: number of fragments in the message
+            data: contents of this fragment
+
+        Returns:
+            the whole datagram if this was its last missing fragment, else None
+        """
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+            if key in self.finished:
+                self.stale += 1
+                return None
+            entry = self.pending.get(key)
+            if (not 0 <= index < count <= 2**16 
+                    or entry is not None and entry[1] != count):
+                self.invalid += 1
+                return None
+            if entry is None:
+                entry = self.pending[key] = [now + self.timeout, count, {}]
+            parts = entry[2]
+            if index in parts:
+                self.stale += 1
+                return None
+            parts[index] = data
+            self.pending_bytes += len(data) + self.overhead
+            if len(parts) == count:
+                self._finish(key)
+                self.completed += 1
+                return b''.join(parts[i] for i in range(count))
+            while self.pending_bytes > self.max_bytes:
+                self._finish(next(iter(self.pending)))
+                self.evicted += 1
+            return None
+
+    def _finish(self, key):
+        _, _, parts = self.pending.pop(key)
+        self.pending_bytes -= sum(len(p) for p in parts.values())
+        self.pending_bytes -= self.overhead * len(parts)
+        self.finished[key] = None
+        if len(self.finished) > self.history:
+            self.finished.popitem(last=False)
+
+    def _expire(self, now):
+        # messages are in order of first arrival, so also of deadline
+        while self.pending:
+            key, (deadline, _, _) = next(iter(self.pending.items()))
+            if deadline > now:
+                break
+            self._finish(key)
+            self.timed_out += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            self._expire(time.monotonic())
+            return {
+                'pending': len(self.pending),
+                'pending_bytes': self.pending_bytes,
+                'completed': self.completed,
+                'timed_out': self.timed_out,
+                'evicted': self.evicted,
+                'stale': self.stale,
+                'invalid': self.invalid,
+            }
+
+def _stack_batch(batch:List[tuple]):
+    """stack a batch of messages into a 2D array if their items all have
+    the same numeric types, else return the list of messages
+    """
+    types = tuple(map(type, batch[0]))
+    if (types and all(t is int or t is float for t in types)
+            and all(tuple(map(type, items))==types for items in batch)):
+        return np.array(batch)
+    return batch
+
+class _Batcher:
+    """
+    accumulates messages for a batch handler (see `OSC.handle`),
+    delivering them per address every `count` messages, 
+    or `interval` seconds after the first message of a batch.
+    with `count`, a partial batch is delivered once no message has arrived
+    for its address in `idle` seconds.
+    timed deliveries run on `scheduler`, which batchers can share.
+    """
+    def __init__(self, deliver, scheduler:Scheduler=None, 
+            count:int=None, interval:float=None, idle:float=None):
+        """
+        Args:
+            deliver: called with (sender, address, batch)
+            scheduler: runs timed deliveries, needed with `interval` or `idle`
+            count: number of messages per batch
+            interval: seconds from the first message to delivering a batch
+            idle: seconds without messages before delivering a partial batch
+        """
+        self.deliver = deliver
+        self.scheduler = scheduler
+        self.count = count
+        self.interval = interval
+        self.idle = idle
+        # delay of timed deliveries
+        self.wait = interval if count is None else idle
+        self.lock = Lock()
+        # address -> [latest sender, list of messages, latest arrival time]
+        self.pending = {}
+        # if a timed delivery is scheduled
+        self.waiting = False
+
+    def add(self, client, address, items):
+        now = time.time()
+        with self.lock:
+            entry = self.pending.get(address)
+            if entry is None:
+                entry = self.pending[address] = [client, [], now]
+            entry[0] = client
+            entry[1].append(items)
+            entry[2] = now
+            schedule = self.wait is not None and not self.waiting
+            self.waiting = self.waiting or schedule
+            full = self.count is not None and len(entry[1]) >= self.count
+            if full:
+                del self.pending[address]
+        if schedule:
+            self.scheduler.at(now + self.wait, self._timed)
+        if full:
+            self.deliver(entry[0], address, _stack_batch(entry[1]))
+
+    def flush(self):
+        """deliver everything accumulated so far"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for address, (client, batch, _) in pending.items():
+            self.deliver(client, address, _stack_batch(batch))
+
+    def _timed(self):
+        now = time.time()
+        with self.lock:
+            if self.count is None:
+                due, self.pending = self.pending, {}
+            else:
+                due = {
+                    address: entry for address, entry in self.pending.items() 
+                    if now - entry[2] >= self.idle}
+                for address in due:
+                    del self.pending[address]
+            if self.pending:
+                # when the longest waiting address will be idle
+                t = min(entry[2] for entry in self.pending.values()) + self.idle
+            else:
+                t = None
+                self.waiting = False
+        if t is not None:
+            self.scheduler.at(t, self._timed)
+        for address, (client, batch, _) in due.items():
+            self.deliver(client, address, _stack_batch(batch))
+
+class _OSCProtocol(asyncio.DatagramProtocol):
+    """passes datagrams received on the event loop to an OSC dispatcher"""
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, client_address):
+        try:
+            self.dispatcher.call_handlers_for_packet(data, client_address)
+        except Exception:
+            traceback.print_exc()
+
 class OSC():
     """
     iipyper OSC object.
@@ -259,29 +1097,150 @@ class OSC():
     """
     def __init__(self, 
         host:str="127.0.0.1", port:int=9999, 
-        verbose:int=1, concurrent:bool=False):
+        verbose:int=1, concurrent:bool|int=False, validate:str='strict',
+        backend:str='thread', queue_size:int=1024, ordered:str=None,
+        mtu:int=1472, timetags:bool=True, fragment_size:Optional[int]=None,
+        fragment_timeout:float=1.0, fragment_memory:int=2**26,
+        sockets:int=1, max_senders:int=256,
+        send_mode:str='sync', send_queue_size:int=1024, coalesce:bool=False,
+        rcvbuf:Optional[int]=None, metrics:bool|Metrics=False,
+        stats_route:Optional[str]='/iipyper/stats', lanes:int=1,
+        decoder:str='python-osc'):
         """
         TODO: Expand to support multiple IPs + ports
 
         Args:
             host (str): IP address
             port (int): port to receive on
-            verbose (bool): whether to print activity
-            concurrent (bool): if True, handle each incoming OSC message on 
-                its own thread. otherwise, incoming OSC is handled serially on 
+            verbose (bool): whether to print activity.
+                messages and handler calls are logged on a background thread,
+                and can be sampled by category, e.g.
+                `iipyper.log.get_sink().sample('osc.call', 100)`
+            concurrent (bool|int): if True, handle incoming OSC messages on a
+                pool of 4 worker threads, or give the number of workers.
+                otherwise, incoming OSC is handled serially on 
                 one thread for the whole OSC object.
+            validate (str): default validation mode for handlers,
+                see `OSC.handle`
+            backend (str): 'thread' to receive OSC with a python-osc server
+                on its own thread, or 'asyncio' to receive on the iipyper
+                event loop (`concurrent` is then ignored), or 'native' to
+                receive on a thread which reads all waiting datagrams at once
+                (see `OSC.receive_stats()`).
+                `async def` handlers run on the event loop with any backend.
+            queue_size (int): with `concurrent`, max number of messages 
+                waiting per worker. further messages are dropped and counted
+                (see `OSC.pool.stats()`).
+            ordered (str): with `concurrent`, 'route' to handle messages
+                to the same address in order, or 'sender' to handle messages
+                from the same sender in order.
+                otherwise, messages may be handled in any order.
+            mtu (int): default max size in bytes of bundles sent 
+                (see `OSC.bundle`)
+            timetags (bool): if True, hold the contents of incoming bundles 
+                timetagged in the future, and dispatch them at their timetag
+                (see `OSC.scheduler.stats()` for late arrivals).
+                if False, dispatch bundle contents as soon as they arrive.
+            fragment_size (int): if given, split datagrams sent larger than 
+                this many bytes into fragments, and reassemble fragments
+                received. both ends need fragmenting enabled.
+                should be at most 65507 (the UDP limit), or the path MTU to
+                avoid IP fragmentation.
+                the receiver's socket buffer (SO_RCVBUF) needs to be large
+                enough to hold the fragments arriving in a burst.
+            fragment_timeout (float): seconds to wait for all fragments of
+                a message before discarding it
+            fragment_memory (int): max bytes of incomplete messages to hold,
+                beyond which the oldest are discarded
+                (see `OSC.reassembler.stats()`).
+            sockets (int): number of UDP sockets shared by all clients
+            max_senders (int): max number of reply addresses to keep clients 
+                for. the least recently used are forgotten beyond this 
+                (see `OSC.client_stats()`).
+            send_mode (str): 'sync' to encode and send messages on the thread
+                calling `send`, or 'async' to queue them for a sender thread.
+                in 'async' mode, don't modify arrays after passing them to 
+                `send`, since they are encoded later.
+            send_queue_size (int): in 'async' mode, max number of messages
+                waiting. further messages are dropped and counted
+                (see `OSC.sender.stats()`).
+            coalesce (bool): in 'async' mode, a message waiting to be sent 
+                is replaced by a newer one to the same client and route.
+            rcvbuf (int): if given, size in bytes of the socket receive buffer,
+                which holds datagrams arriving faster than they are handled.
+                on Linux, limited by net.core.rmem_max.
+            metrics (bool|Metrics): if True, record counts and timings for each
+                handler (see `OSC.metrics.snapshot()`). pass a `Metrics`
+                to share it with other `OSC` or `MIDI` objects.
+            stats_route (str): with `metrics`, any message to this address
+                is answered with the metrics as a JSON string.
+                None to disable.
+            lanes (int): number of worker threads for handlers with a queue
+                (see `OSC.handle`), started when the first is added.
+            decoder (str): 'python-osc' to decode incoming packets with
+                python-osc, or 'fast' to decode messages with common typetags
+                (i, f, d, h, s, b, T, F, N) with a `struct` format compiled
+                once per typetag string, falling back to python-osc
+                for others (see `iipyper.decode`).
         """
+        if validate not in _validation_modes:
+            raise ValueError(
+                f'OSC: validate should be one of {_validation_modes}')
+        if backend not in _backends:
+            raise ValueError(f'OSC: backend should be one of {_backends}')
+        if send_mode not in _send_modes:
+            raise ValueError(f'OSC: send_mode should be one of {_send_modes}')
+        if decoder not in _decoders:
+            raise ValueError(f'OSC: decoder should be one of {_decoders}')
         self.verbose = verbose
+        self.validate = validate
+        self.backend = backend
         self.concurrent = concurrent
         self.host = host
         self.port = port
-        self.dispatcher = Dispatcher()
+        self.queue_size = queue_size
+        self.ordered = ordered
+        self.mtu = mtu
+        self.rcvbuf = rcvbuf
+        if metrics is True:
+            metrics = Metrics()
+        self.metrics = metrics or None
+        self.scheduler = Scheduler(name='iipyper OSC scheduler') if timetags else None
+        self.dispatcher = OSCDispatcher()
+        self.dispatcher.set_scheduler(self.scheduler)
+        if decoder == 'fast':
+            self.dispatcher.set_decoder(decode_packet)
+        self.fragment_size = fragment_size
+        self.reassembler = None
+        if fragment_size is not None:
+            self._fragment_ids = it.count()
+            self.reassembler = FragmentReassembler(
+                fragment_timeout, fragment_memory)
+            self.dispatcher.map(
+                _fragment_route, self._on_fragment, needs_reply_address=True)
+        self.pool = None
+        self.lane_workers = lanes
+        self.lanes = None
+        # timed deliveries for all batch routes
+        self.batch_scheduler = None
         self.server = None
+        self.sockets = UDPSocketPool(sockets)
         self.clients = {} # (host,port) -> client
         self.client_names = {} # (name) -> (host,port)
+        # (host,port) -> client, for replies to addresses without a named client
+        self.senders = ClientCache(self._make_sender_client, max_senders)
+        self.sender = None
+        if send_mode == 'async':
+            self.sender = AsyncSender(
+                self._send_now, send_queue_size, coalesce, 
+                name='iipyper OSC sender')
 
         self.handler_docs = []
 
+        if self.metrics is not None and stats_route is not None:
+            self.dispatcher.map(
+                stats_route, self._on_stats, needs_reply_address=True)
+
         self.create_server()
 
     def create_server(self):#, host=None, port=None):
@@ -292,18 +1251,61 @@ class OSC():
         #     host = self.host
         # if (port is None):
         #     port = self.port
-        cls = ThreadingOSCUDPServer if self.concurrent else BlockingOSCUDPServer
+        if (self.server is not None):
+            print("OSC server already exists")
+            return
 
-        if (self.server is None):
-            self.server = cls((self.host, self.port), self.dispatcher)
-            if self.verbose > 0:
-                print(f"OSC server created {self.host}:{self.port}")
+        if self.backend == 'asyncio':
+            # receive on the iipyper event loop
+            loop = _get_loop()
+            self.server, _ = asyncio.run_coroutine_threadsafe(
+                loop.create_datagram_endpoint(
+                    lambda: _OSCProtocol(self.dispatcher),
+                    local_addr=(self.host, self.port)),
+                loop).result()
+            if self.rcvbuf is not None:
+                set_rcvbuf(self.server.get_extra_info('socket'), self.rcvbuf)
+        else:
+            if self.concurrent:
+                # receive on one thread, handle on a fixed pool of workers
+                workers = 4 if self.concurrent is True else int(self.concurrent)
+                self.pool = WorkerPool(workers, self.queue_size, name='iipyper OSC')
+                self.dispatcher.set_pool(self.pool, self.ordered)
+            if self.backend == 'native':
+                self.server = UDPReceiver(
+                    self.host, self.port, 
+                    self.dispatcher.call_handlers_for_packet,
+                    rcvbuf=self.rcvbuf, name='iipyper OSC receiver')
+            else:
+                self.server = BlockingOSCUDPServer(
+                    (self.host, self.port), self.dispatcher)
+                if self.rcvbuf is not None:
+                    set_rcvbuf(self.server.socket, self.rcvbuf)
+                # start the OSC server on its own thread
+                Thread(target=self.server.serve_forever, daemon=True).start()
+                # self.server.serve_forever()
+
+        if self.verbose > 0:
+            print(f"OSC server created {self.host}:{self.port}")
 
-            # start the OSC server on its own thread
-            Thread(target=self.server.serve_forever, daemon=True).start()
-            # self.server.serve_forever()
+    def receive_stats(self) -> dict:
+        """
+        size of the socket receive buffer, and kernel counters of bytes 
+        waiting and datagrams dropped where available (Linux).
+        with the 'native' backend, also counts of datagrams received and 
+        how many were read per wakeup.
+        """
+        if self.backend == 'asyncio':
+            sock = self.server.get_extra_info('socket')
         else:
-            print("OSC server already exists")
+            sock = self.server.socket
+        stats = {
+            'rcvbuf': sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF),
+            **udp_socket_info(sock),
+        }
+        if self.backend == 'native':
+            stats.update(self.server.stats())
+        return stats
 
     # def close_server(self):
     #     """
@@ -334,7 +1336,7 @@ class OSC():
         if (port == None):
             port = 57120
         if ((host, port) not in self.clients):
-            self.clients[host, port] = SimpleUDPClient(host, port)
+            self.clients[host, port] = PooledUDPClient(self.sockets, host, port)
             if self.verbose > 0:
                 print(f"OSC client created {host}:{port}")
         else:
@@ -342,17 +1344,44 @@ class OSC():
         self.client_names[name] = (host, port)
 
     def get_client_by_name(self, name):
+        address = self.client_names.get(name)
+        if address is None:
+            # reply addresses used to be added as clients named 'host:port'
+            address = _host_port(name)
+            if address is not None:
+                return self.get_client_by_sender(address)
         try:
-            return self.clients[self.client_names[name]]
+            return self.clients[address]
         except Exception:
             print(f'no client with name "{name}"')
             return None
 
     def get_client_by_sender(self, address):
-        if address not in self.clients:
-            host, port = address
-            self.create_client(f'{host}:{port}', host, port)
-        return self.clients[address]
+        client = self.clients.get(address)
+        if client is None:
+            client = self.senders.get(address)
+        return client
+
+    def _make_sender_client(self, host, port):
+        if self.verbose > 0:
+            log('osc.client', 'OSC reply client created {}:{}', host, port)
+        return PooledUDPClient(self.sockets, host, port)
+
+    def queue_stats(self) -> dict:
+        """
+        for each route with a queue (see `OSC.handle`): current and max depth,
+        messages enqueued, dropped, coalesced and handled, and a histogram
+        of time spent waiting in the queue ('residency').
+        """
+        return {} if self.lanes is None else self.lanes.stats()
+
+    def client_stats(self) -> dict:
+        """counts of sockets, messages sent, and reply address cache use"""
+        return {
+            'clients': len(self.clients),
+            **self.sockets.stats(),
+            **self.senders.stats(),
+        }
 
     def send(self, route:str, *msg, client:Optional[str]=None):
         """
@@ -360,25 +1389,32 @@ class OSC():
 
         Args:
             route: e.g. '/my/osc/route' or 'host:port/my/osc/route'
-            *msg: contents of OSC message
-            client: name of OSC client or None to use default client
+            *msg: contents of OSC message.
+                numpy arrays are sent as blobs with a header giving dtype
+                and shape, see `iipyper.ndarray_to_blob`.
+            client: name of OSC client or None to use default client.
+                within `OSC.bundle`, the message is added to the bundle.
+
+        with `send_mode='async'`, the message is queued and sent 
+        on the sender thread (see `OSC.__init__`).
         """
         if len(self.clients)==0:
             print('ERROR: iipyper: send: no OSC clients. use `create_client` to make one.')
             return
 
+        bundle = _current_bundle()
+        if client is None and bundle is not None and ':' not in route:
+            client = bundle.client
+
         if client is not None:
             client = self.get_client_by_name(client)
         elif ':' in route:
-            try:
-                client_str, route = route.split('/', 1)
-                assert ':' in client_str
-                host, port = client_str.split(':')
-                assert '/' not in host
-                port = int(port)
-                client = self.get_client_by_sender((host, port))
-            except Exception:
+            client_str, _, route = route.partition('/')
+            address = _host_port(client_str)
+            if address is None:
                 print(f'failed to get client address from OSC route "{route}"')
+            else:
+                client = self.get_client_by_sender(address)
         else:
             client = next(iter(self.clients.values()))
 
@@ -388,13 +1424,102 @@ class OSC():
 
         if not route.startswith('/'):
             route = '/'+route
-        client.send_message(route, msg)
+        if bundle is not None:
+            bundle.add(self, client, _build_message(route, _encode_items(msg)))
+        else:
+            self._send(client, route, msg)
         if self.verbose > 0:
-            print(f"OSC message sent {route}:{msg}")
+            log('osc.send', 'OSC message sent {}:{}', route, msg)
+
+    def _send(self, client, route:Optional[str], items):
+        """send now or queue for the sender thread, depending on `send_mode`"""
+        if self.sender is None:
+            self._send_now(client, route, items)
+        elif route is None:
+            self.sender.put((client, route, items))
+        else:
+            self.sender.put((client, route, items), key=(client, route))
+
+    def _send_now(self, client, route:Optional[str], items):
+        """encode and send a message, or send a datagram if route is None"""
+        if route is None:
+            self._send_dgram(client, items)
+            return
+        items = _encode_items(items)
+        if self.fragment_size is None:
+            client.send_message(route, items)
+        else:
+            self._send_dgram(client, _build_message(route, items))
+
+    def _on_stats(self, client_address, address, *a):
+        self._reply(client_address, (address, self.metrics.json()))
+
+    def _send_dgram(self, client, dgram:bytes):
+        """send a datagram, as fragments if it is too large"""
+        if self.fragment_size is None or len(dgram) <= self.fragment_size:
+            client.send(_Datagram(dgram))
+            return
+        msg_id = next(self._fragment_ids) & 0x7fffffff
+        for frag in _fragments(dgram, msg_id, self.fragment_size):
+            client.send(_Datagram(frag))
+
+    def _on_fragment(self, client_address, address, msg_id, index, count, data):
+        dgram = self.reassembler.add((client_address, msg_id), index, count, data)
+        if dgram is not None:
+            self.dispatcher.call_handlers_for_packet(dgram, client_address)
+
+    def bundle(self, client:Optional[str]=None, timetag:Optional[float]=None, 
+            mtu:Optional[int]=None):
+        """
+        Collect messages sent on this thread, and send them in as few bundles
+        as possible when the block exits. 
+
+        ```python
+        with osc.bundle(client='my_client', timetag=time.time()+0.1):
+            for i,v in enumerate(values):
+                osc.send(f'/param/{i}', v)
+        ```
+
+        Args:
+            client: name of OSC client to send to when `send` doesn't specify one
+            timetag: time to execute the bundle at, in seconds since the epoch 
+                (as from `time.time()`). if None, execute immediately
+            mtu: max size of each bundle in bytes, defaults to `OSC.mtu`. 
+                messages which don't fit are split into further bundles.
+        """
+        return _Bundle(client, timetag, mtu)
     
+    def template(self, route:str, typetags:str, client:Optional[str]=None
+            ) -> OSCTemplate:
+        """
+        Make a template for sending messages to `route` with the same types
+        repeatedly, which is faster than `OSC.send`:
+        the address and typetags are encoded once.
+
+        Example:
+        ```
+        pos = osc.template('/particles/pos', 'iff')
+        pos.send(0, 0.5, 0.25)
+        ```
+
+        Args:
+            route: OSC address, e.g. '/my/osc/route'
+            typetags: one character per argument:
+                'i' int32, 'h' int64, 'f' float32, 'd' float64,
+                's' string, 'b' blob (bytes, or numpy array as in `OSC.send`),
+                'T' True, 'F' False, 'N' None (these take no argument).
+                messages with only fixed-size types (not 's' or 'b') are 
+                packed into a reused buffer.
+            client: name of OSC client, or None to use the default client.
+        """
+        return OSCTemplate(self, route, typetags, client)
+
     def handle(self, 
             route:str=None, return_host:str=None, return_port:int=None,
-            allow_pos=None, allow_kw=True, lock=True, doc:str=None):
+            allow_pos=None, allow_kw=True, lock=True, doc:str=None,
+            validate:str=None, batch_count:int=None, 
+            batch_interval:float=None, batch_idle:float=0.1,
+            queue:int=None, drop:str='drop-oldest', priority:str|int=None):
         """
         OSC handler decorator supporting mixed args and kwargs, typing.
 
@@ -405,6 +1530,10 @@ class OSC():
         If the decorated function returns a value, it should be a tuple beginning
         with the OSC route to reply to, followed by the message contents.
 
+        The decorated function can be `async def`, in which case it runs on the
+        iipyper event loop, and any reply is sent when it completes. Many slow
+        handlers can then be awaiting at once without tying up the OSC server.
+
         Args:
             route: OSC path for this handler. If not given,
                 use the name of the decorated function.
@@ -420,8 +1549,43 @@ class OSC():
             kwargs: if True (default), parse OSC message for key-value pairs
                 corresponding to named arguments of the decorated function.
             lock: if True (default), use the global iipyper lock around the
-                decorated function
+                decorated function. for an `async def` function, the lock
+                is not held while the coroutine runs.
             doc: replace the docstring of the decorated function
+            validate: how to check arguments against the type annotations of
+                the decorated function. if not given, use the default for
+                this OSC object (see `OSC.__init__`).
+                'strict': validate with `pydantic.validate_call`
+                'fast': convert int, float, str, bool, NDArray and Splat
+                    annotated arguments directly, pass anything else through
+                'off': call the decorated function as-is
+            batch_count: if given, accumulate messages, and call the decorated 
+                function as `f(address, batch)` every `batch_count` messages
+                for each address matched. 
+                messages are not parsed or validated: the batch is a 2D numpy 
+                array with a row per message if all messages have the same 
+                int and float items, else a list of tuples of OSC items.
+                if there is a return value, it is sent to the latest sender.
+            batch_interval: like `batch_count`, but call the decorated function
+                `batch_interval` seconds after the first message of each batch.
+            batch_idle: with `batch_count`, deliver a partial batch
+                once no message has arrived for its address in this many
+                seconds. None to only deliver full batches.
+                timed batches are delivered on one thread per `OSC` object.
+            queue: if given, messages wait in a queue of this many for this
+                route, and are handled on the `OSC.lanes` worker threads,
+                so a slow handler doesn't hold up other routes
+                (unless it holds the iipyper lock, see `lock`).
+                time spent waiting is reported by `OSC.queue_stats()`.
+            drop: when the queue is full, 'drop-oldest' to discard the oldest
+                waiting message, 'drop-newest' to discard the new one.
+                'coalesce' to keep only the latest waiting message for each
+                address (also when not full).
+            priority: 'control', 'default' or 'bulk' (or an int, lower first).
+                queued messages with a higher priority are handled first,
+                e.g. `priority='control'` for `/transport/stop`, and
+                `priority='bulk'` for `/particles/pos`.
+                implies a queue of 64 if `queue` isn't given.
 
         keyword arguments of the decorated function:
             if a string with the same name as a parameter is found, 
@@ -482,8 +1646,21 @@ class OSC():
                     JSON format: see `iipyper.ndarray_to_json`
                         (no support for complex dtypes)
                     repr format: see `numpy.array_repr`
-                decode bytes to a 1-dimensional float32 array
-                    TODO: support annotating dtype via pydantic_numpy types
+                decode bytes with an iipyper header to an array of the 
+                    sender's dtype and shape, without copying.
+                    see `iipyper.ndarray_to_blob`
+                decode other bytes to a 1-dimensional float32 array
+
+            pydantic_numpy array types (e.g. `Np2DArrayFp32`, `NpNDArrayInt16`
+            from `pydantic_numpy.typing`):
+                decode like NDArray, but raw bytes are read as the annotated 
+                dtype, and arrays are cast only if their dtype differs.
+                the number of dimensions is checked when validating.
+
+            `Annotated[<array type>, Shape(...)]`, e.g. 
+            `Annotated[Np2DArrayFp32, Shape(None, 3)]`:
+                decode like the array type, and reject arrays of other shapes
+                when decoding and when validating (see `iipyper.types.Shape`).
 
             other types:
                 will be decoded by python-osc and validated by pydantic
@@ -498,7 +1675,10 @@ class OSC():
 
         def decorator(f, route=route, 
                 return_host=return_host, return_port=return_port,
-                allow_pos=allow_pos, allow_kw=allow_kw, doc=doc):
+                allow_pos=allow_pos, allow_kw=allow_kw, doc=doc,
+                validate=validate, batch_count=batch_count,
+                batch_interval=batch_interval,
+                queue=queue, drop=drop, priority=priority):
             # default_route = f'/{f.__name__}/*'
             if route is None:
                 route = f'/{f.__name__}'
@@ -507,32 +1687,8 @@ class OSC():
 
             # get info out of function signature
             sig = inspect.signature(f)
-
-            positional_params = []
-            named_params = {}
-            has_varp = False
-            has_varkw = False
-            all_default = True
-            pos = True
-            for i,(name,p) in enumerate(sig.parameters.items()):
-                if i==0:
-                    # skip first argument (the OSC route)
-                    continue
-                # print(p, p.kind)
-                
-                if p.kind == p.VAR_POSITIONAL:
-                    pos = False # no more positional args after variadic
-                    all_default = False
-                elif p.kind == p.VAR_KEYWORD:
-                    pos = False # no more positional args after variadic
-                else:
-                    if p.default == p.empty:
-                        all_default = False
-                    named_params[name] = p
-                    if pos:
-                        positional_params.append(p)
-                has_varp |= p.kind==p.VAR_POSITIONAL
-                has_varkw |= p.kind==p.VAR_KEYWORD
+            sig_info, all_default = _signature_info(sig)
+            positional_params, named_params, has_varp, has_varkw = sig_info
 
             # set allow_pos to False if it hasn't been explicitly set to True,
             # and all parameters have defaults or are VAR_KEYWORD
@@ -553,8 +1709,31 @@ class OSC():
             doc = doc or f.__doc__
             self.handler_docs.append((route, doc))
 
-            # wrap with pydantic validation decorator
-            f = pydantic.validate_call(f)
+            # async handlers are timed and counted when they complete
+            is_async = inspect.iscoroutinefunction(f)
+
+            # compile the signature into a parser for incoming messages
+            parser = _OSCParser(sig_info, allow_pos, allow_kw)
+
+            if validate is None:
+                validate = self.validate
+            if validate not in _validation_modes:
+                raise ValueError(
+                    f'OSC.handle: validate should be one of {_validation_modes}')
+            if batch_count is not None and batch_interval is not None:
+                raise ValueError(
+                    'OSC.handle: give only one of batch_count and batch_interval')
+            batch = batch_count is not None or batch_interval is not None
+            if batch:
+                # batches are delivered as they are
+                validate = 'off'
+            if validate == 'strict':
+                # wrap with pydantic validation decorator
+                f = pydantic.validate_call(f)
+            elif validate == 'fast':
+                f = _fast_validate(f, sig)
+
+            metrics = None if self.metrics is None else self.metrics.route(route)
 
             def handler(client, address, *osc_items):
                 """
@@ -567,53 +1746,63 @@ class OSC():
                 if not address.startswith('/'):
                     address = '/' + address
 
+                if metrics is not None:
+                    metrics.count += 1
+                    t = time.perf_counter()
                 try:
-                    args, kw = _parse_osc_items(
-                        osc_items, 
-                        (positional_params, named_params, has_varp, has_varkw), 
-                        allow_pos, allow_kw,
-                        self.verbose
-                    )
+                    args, kw = parser(osc_items, self.verbose)
                 except Exception:
+                    if metrics is not None:
+                        metrics.errors += 1
                     raise ValueError(f"""
                     {address} {osc_items}
                     failed to parse OSC for function with signature: {sig}
                     """)
                 # print(f'{args=}, {kw=}')
+                if metrics is not None:
+                    metrics.parse.record(time.perf_counter() - t)
 
+                call(client, address, args, kw)
+
+            def call(client, address, args, kw):
                 try:
                     if self.verbose > 0:
-                        argss = str((args, kw))
-                        if len(argss) > 50 and self.verbose<2:
-                            argss = argss[:47]+'...'
-                        print('iipyper OSC call', address, argss)
-
-                    r = maybe_lock(f, lock, address, *args, **kw)
+                        log('osc.call', 'iipyper OSC call {} {}', 
+                            address, Truncated(
+                                (args, kw), 50 if self.verbose<2 else None))
+
+                    if metrics is None or is_async:
+                        t = None if metrics is None else time.perf_counter()
+                        try:
+                            r = maybe_lock(f, lock, address, *args, **kw)
+                        except Exception:
+                            if metrics is not None:
+                                metrics.errors += 1
+                            raise
+                    else:
+                        try:
+                            r = timed_call(
+                                metrics, _lock if lock else None,
+                                f, address, *args, **kw)
+                        except Exception:
+                            metrics.errors += 1
+                            raise
+                        if r is not None:
+                            metrics.replies += 1
                     # if there was a return value,
                     # send it as a message back to the sender
-                    if r is not None:
-                        if not hasattr(r, '__len__'):
-                            print("""
-                            value returned from OSC handler should start with route
-                            """)
-                        else:
-                            client = (
-                                client[0] if return_host is None else return_host,
-                                client[1] if return_port is None else return_port
-                            )
-                            if self.verbose > 0:
-                                rs = str(r)
-                                if len(rs) > 50 and self.verbose<2:
-                                    rs = rs[:47]+'...'
-                                print('iipyper OSC return', client, rs)
-                            try:
-                                self.get_client_by_sender(client).send_message(
-                                    r[0], r[1:])
-                            except ValueError:
-                                rt = [type(item) for item in r]
-                                print(
-                                    f'iipyper OSC return to {r[0]} failed,' 
-                                    f'possibly an unsupported type in {rt}')
+                    reply_to = (
+                        client[0] if return_host is None else return_host,
+                        client[1] if return_port is None else return_port
+                    )
+                    if inspect.isawaitable(r):
+                        # async def handler: run on the event loop,
+                        # reply when done
+                        self._run_async(
+                            r, lambda r: self._reply(reply_to, r), address,
+                            metrics, t)
+                    else:
+                        self._reply(reply_to, r)
                             
                 except pydantic.ValidationError as e:
                     print(f'ERROR: iipyper OSC handler:')
@@ -623,12 +1812,87 @@ class OSC():
                         inp = info['input']
                         print(f'\t{inp.args} {inp.kwargs}')
                         print(f'\t{msg} {loc}')
+                except _CoercionError as e:
+                    print(f'ERROR: iipyper OSC handler:')
+                    print(f'\t{e}')
+
+            if batch:
+                idle = batch_idle if batch_interval is None else None
+                timed = batch_interval is not None or idle is not None
+                if timed and self.batch_scheduler is None:
+                    self.batch_scheduler = Scheduler(
+                        tick=None, name='iipyper OSC batch')
+                batcher = _Batcher(
+                    lambda c, a, b: call(c, a, (b,), {}), self.batch_scheduler,
+                    count=batch_count, interval=batch_interval, idle=idle)
+                def handler(client, address, *osc_items):
+                    if not address.startswith('/'):
+                        address = '/' + address
+                    if metrics is not None:
+                        metrics.count += 1
+                    batcher.add(client, address, osc_items)
+
+            if queue is not None or priority is not None:
+                if self.lanes is None:
+                    self.lanes = Lanes(self.lane_workers, name='iipyper OSC lane')
+                rq = self.lanes.queue(
+                    route, 64 if queue is None else queue, drop,
+                    'default' if priority is None else priority)
+                handle_now = handler
+                def handler(client, address, *osc_items):
+                    self.lanes.put(
+                        rq, handle_now, client, address, *osc_items,
+                        key=address)
 
             self.add_handler(route, handler)
             return f
 
         return decorator if f is None else decorator(f)
     
+    def _reply(self, client, r):
+        """send the return value of a handler"""
+        if r is None:
+            return
+        if not hasattr(r, '__len__'):
+            print("""
+            value returned from OSC handler should start with route
+            """)
+            return
+        if self.verbose > 0:
+            log('osc.return', 'iipyper OSC return {} {}', 
+                client, Truncated(r, 50 if self.verbose<2 else None))
+        try:
+            self._send_dgram(
+                self.get_client_by_sender(client),
+                _build_message(r[0], _encode_items(r[1:])))
+        except ValueError:
+            rt = [type(item) for item in r]
+            print(
+                f'iipyper OSC return to {r[0]} failed,' 
+                f'possibly an unsupported type in {rt}')
+
+    def _run_async(self, coro, done, address, metrics=None, t=None):
+        """run a coroutine from an `async def` handler on the event loop,
+        then call `done` with its result.
+        if `metrics` is given, record the handler time from `t` to completion.
+        """
+        def callback(fut):
+            if metrics is not None:
+                metrics.handler.record(time.perf_counter() - t)
+            try:
+                r = fut.result()
+            except Exception:
+                if metrics is not None:
+                    metrics.errors += 1
+                print(f'error in OSC handler {address}:')
+                traceback.print_exc()
+                return
+            if metrics is not None and r is not None:
+                metrics.replies += 1
+            done(r)
+        fut = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+        fut.add_done_callback(callback)
+
     def args(self, route=None, return_host=None, return_port=None):
         """like `handle`, but only positional arguments are allowed.
 
@@ -675,34 +1939,155 @@ class OSC():
         """
         self.send(*a, client=client, **kw)
 
+def _unchanged(value, last, epsilon:float) -> bool:
+    """test if `value` is within `epsilon` of `last`, 
+    elementwise for numeric arrays and for sequences of mixed items
+    """
+    try:
+        a, b = np.asarray(value), np.asarray(last)
+        if a.dtype.kind in 'biuf' and b.dtype.kind in 'biuf':
+            return a.shape==b.shape and bool(np.all(
+                np.abs(a.astype(float) - b.astype(float)) <= epsilon))
+    except ValueError:
+        # ragged
+        pass
+    if isinstance(value, (tuple, list)) and isinstance(last, (tuple, list)):
+        return len(value)==len(last) and all(
+            _unchanged(v, l, epsilon) for v,l in zip(value, last))
+    try:
+        return bool(value == last)
+    except Exception:
+        return False
+
+def _snapshot(value):
+    """copy of a value to compare later, in case the caller mutates it"""
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, (tuple, list)):
+        try:
+            a = np.array(value)
+            if a.dtype.kind in 'biuf':
+                return a
+        except ValueError:
+            pass
+        return tuple(_snapshot(v) for v in value)
+    return value
+
+class _RateLimit:
+    """
+    decides when an updater fires: every `count` calls, or at most every
+    `min_interval` seconds if given; and whether a value has changed by more
+    than `epsilon` since it last fired, or `max_interval` has passed.
+    a check suppressed as unchanged restarts the rate limit like firing does,
+    so change suppression only ever reduces the rate.
+    counts what was suppressed.
+    """
+    def __init__(self, count:int, hz:float=None, min_interval:float=None,
+            max_interval:float=None, epsilon:float=None):
+        if hz is not None:
+            min_interval = max(min_interval or 0, 1/hz)
+        self.count = count
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.epsilon = epsilon
+        self.counter = 0
+        # last time checked (fired or suppressed as unchanged)
+        self.last_time = -float('inf')
+        self.last_fired = -float('inf')
+        self.last_value = None
+        self.calls = 0
+        self.fired = 0
+        self.rate_limited = 0
+        self.unchanged = 0
+
+    def ready(self, now:float) -> bool:
+        """call once per update; True if the rate limit allows firing"""
+        self.calls += 1
+        self.counter += 1
+        if self.min_interval is None:
+            ok = self.counter >= self.count
+        else:
+            ok = now - self.last_time >= self.min_interval
+        if not ok:
+            self.rate_limited += 1
+        return ok
+
+    def overdue(self, now:float) -> bool:
+        """True if `max_interval` has passed since firing"""
+        return (self.max_interval is not None
+            and now - self.last_fired >= self.max_interval)
+
+    def changed(self, value, now:float) -> bool:
+        """False if `value` is within `epsilon` of the last value fired,
+        unless `max_interval` has passed
+        """
+        if (self.epsilon is None or self.fired == 0 or self.overdue(now)
+                or not _unchanged(value, self.last_value, self.epsilon)):
+            return True
+        self.unchanged += 1
+        # wait for the rate limit again before the next check
+        self.counter = 0
+        self.last_time = now
+        return False
+
+    def fire(self, now:float, value=None):
+        """record that the updater fired"""
+        self.fired += 1
+        self.counter = 0
+        self.last_time = now
+        self.last_fired = now
+        if self.epsilon is not None:
+            self.last_value = _snapshot(value)
+
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'fired': self.fired,
+            'rate_limited': self.rate_limited,
+            'unchanged': self.unchanged,
+        }
+
 class Updater():
     '''
-    Rate-limited function call
+    Rate-limited function call.
+    fires every `count` calls, or at most `hz` times per second if given.
     '''
 
-    def __init__(self, f, count=30):
+    def __init__(self, f, count=30, hz=None, min_interval=None):
         self.f = f
         self.count = count
-        self.counter = 0
+        self.limit = _RateLimit(count, hz, min_interval)
 
     def __call__(self):
-        self.counter += 1
-        if self.counter >= self.count:
+        now = time.perf_counter()
+        if self.limit.ready(now):
             self.f()
-            self.counter = 0
+            self.limit.fire(now)
+
+    def stats(self):
+        return self.limit.stats()
 
 class ReceiveUpdater:
     '''
     Decouples event handling from updating
-    Updating is rate-limited by a counter
+    Updating is rate-limited by a counter, or by time
+
+    rate limits (all optional):
+        hz: fire at most this many times per second, instead of every `count`
+        min_interval: fire at most once per this many seconds
+        max_interval: fire at least this often while called, even if unchanged
+        epsilon: skip values within epsilon of the last one (0: skip equal)
     '''
 
-    def __init__(self, f, state=None, count=5, update=False):
+    def __init__(self, f, state=None, count=5, update=False,
+            hz=None, min_interval=None, max_interval=None, epsilon=None):
         self.f = f
         self.count = count
-        self.counter = 0
         self.update = update
         self.state = state
+        # fires when the counter exceeds `count`
+        self.limit = _RateLimit(
+            count+1, hz, min_interval, max_interval, epsilon)
 
     def set(self, state):
         '''
@@ -715,28 +2100,43 @@ class ReceiveUpdater:
         '''
         Update the target function with internal state
         '''
-        self.counter += 1
-        if not (self.update and
-                self.counter > self.count and
+        now = time.perf_counter()
+        limit = self.limit
+        if not (limit.ready(now) and
+                (self.update or limit.overdue(now)) and
                 self.state is not None):
             return
-        self.f(*self.state)
-        self.counter = 0
         self.update = False
+        if not limit.changed(self.state, now):
+            return
+        self.f(*self.state)
+        limit.fire(now, self.state)
+
+    def stats(self):
+        return self.limit.stats()
 
 class ReceiveListUpdater:
     '''
     Decouples event handling from updating
-    Updating is rate-limited by a counter
+    Updating is rate-limited by a counter, or by time
     Assumes a list[float] instead of *args
+
+    rate limits (all optional):
+        hz: fire at most this many times per second, instead of every `count`
+        min_interval: fire at most once per this many seconds
+        max_interval: fire at least this often while called, even if unchanged
+        epsilon: skip values within epsilon of the last one (0: skip equal)
     '''
 
-    def __init__(self, f, state=None, count=5, update=False):
+    def __init__(self, f, state=None, count=5, update=False,
+            hz=None, min_interval=None, max_interval=None, epsilon=None):
         self.f = f
         self.count = count
-        self.counter = 0
         self.update = update
         self.state = state
+        # fires when the counter exceeds `count`
+        self.limit = _RateLimit(
+            count+1, hz, min_interval, max_interval, epsilon)
 
     def set(self, state):
         '''
@@ -749,22 +2149,29 @@ class ReceiveListUpdater:
         '''
         Update the target function with internal state
         '''
-        self.counter += 1
-        if not (self.update and
-                self.counter > self.count and
+        now = time.perf_counter()
+        limit = self.limit
+        if not (limit.ready(now) and
+                (self.update or limit.overdue(now)) and
                 self.state is not None):
             return
-        self.f(self.state)
-        self.counter = 0
         self.update = False
+        if not limit.changed(self.state, now):
+            return
+        self.f(self.state)
+        limit.fire(now, self.state)
+
+    def stats(self):
+        return self.limit.stats()
 
 class OSCReceiveUpdater(ReceiveUpdater):
     '''
     ReceiveUpdater with an OSC handler
     '''
 
-    def __init__(self, osc, address: str, f, state=None, count=10, update=False):
-        super().__init__(f, state, count, update)
+    def __init__(self, osc, address: str, f, state=None, count=10, update=False,
+            **limits):
+        super().__init__(f, state, count, update, **limits)
         self.osc = osc
         self.address = address
         osc.add_handler(self.address, self.receive)
@@ -786,8 +2193,9 @@ class OSCReceiveListUpdater(ReceiveListUpdater):
     ReceiveListUpdater with an OSC handler
     '''
 
-    def __init__(self, osc, address: str, f, state=None, count=10, update=False):
-        super().__init__(f, state, count, update)
+    def __init__(self, osc, address: str, f, state=None, count=10, update=False,
+            **limits):
+        super().__init__(f, state, count, update, **limits)
         self.osc = osc
         self.address = address
         osc.add_handler(self.address, self.receive)
@@ -798,35 +2206,66 @@ class OSCReceiveListUpdater(ReceiveListUpdater):
 
 class OSCSend():
     '''
-    Non rate-limited OSC send
+    Non rate-limited OSC send.
+    if `typetags` are given, send with an `OSCTemplate`.
     '''
-    def __init__(self, osc, address: str, f, count=30, client=None):
+    def __init__(self, osc, address: str, f, count=30, client=None,
+            typetags=None):
         self.osc = osc
         self.address = address
         self.f = f
         self.client = client
+        self.template = (
+            None if typetags is None else osc.template(address, typetags, client))
 
     def __call__(self, *args):
-        self.osc.send(self.address, *self.f(*args), client=self.client)
+        if self.template is None:
+            self.osc.send(self.address, *self.f(*args), client=self.client)
+        else:
+            self.template.send(*self.f(*args))
 
 class OSCSendUpdater():
     '''
-    Rate-limited OSC send
+    Rate-limited OSC send.
+    `f` is only called when the rate limit allows sending.
+
+    rate limits (all optional):
+        hz: fire at most this many times per second, instead of every `count`
+        min_interval: fire at most once per this many seconds
+        max_interval: fire at least this often while called, even if unchanged
+        epsilon: skip values within epsilon of the last one (0: skip equal)
+
+    if `typetags` are given, send with an `OSCTemplate`.
     '''
 
-    def __init__(self, osc, address: str, f, count=30, client=None):
+    def __init__(self, osc, address: str, f, count=30, client=None,
+            hz=None, min_interval=None, max_interval=None, epsilon=None,
+            typetags=None):
         self.osc = osc
         self.address = address
         self.f = f
         self.count = count
-        self.counter = 0
         self.client = client
+        self.limit = _RateLimit(count, hz, min_interval, max_interval, epsilon)
+        self.template = (
+            None if typetags is None else osc.template(address, typetags, client))
 
     def __call__(self):
-        self.counter += 1
-        if self.counter >= self.count:
-            self.osc.send(self.address, *self.f(), client=self.client)
-            self.counter = 0
+        now = time.perf_counter()
+        limit = self.limit
+        if not limit.ready(now):
+            return
+        msg = self.f()
+        if not limit.changed(msg, now):
+            return
+        if self.template is None:
+            self.osc.send(self.address, *msg, client=self.client)
+        else:
+            self.template.send(*msg)
+        limit.fire(now, msg)
+
+    def stats(self):
+        return self.limit.stats()
 
 class OSCReceiveUpdaters:
     '''
@@ -835,10 +2274,14 @@ class OSCReceiveUpdaters:
          "/tolvera/particles/vel": s.osc_set_vel})
     '''
 
-    def __init__(self, osc, receives=None, count=10):
+    def __init__(self, osc, receives=None, count=10, **limits):
+        '''
+        limits: rate limits for each updater, see `ReceiveUpdater`
+        '''
         self.osc = osc
         self.receives = []
         self.count = count
+        self.limits = limits
         if receives is not None:
             self.add_dict(receives, count=self.count)
 
@@ -847,16 +2290,22 @@ class OSCReceiveUpdaters:
             count = self.count
         {a: self.add(a, f, count=count) for a, f in receives.items()}
 
-    def add(self, address, function, state=None, count=None, update=False):
+    def add(self, address, function, state=None, count=None, update=False,
+            **limits):
         if count is None:
             count = self.count
+        limits = {**self.limits, **limits}
         self.receives.append(
             OSCReceiveUpdater(self.osc, address, function,
-                              state, count, update))
+                              state, count, update, **limits))
 
     def __call__(self):
         [r() for r in self.receives]
 
+    def stats(self):
+        '''counts of updates made and suppressed, by address'''
+        return {r.address: r.stats() for r in self.receives}
+
 
 class OSCSendUpdaters:
     '''
@@ -866,11 +2315,15 @@ class OSCSendUpdaters:
         })
     '''
 
-    def __init__(self, osc, sends=None, count=10, client=None):
+    def __init__(self, osc, sends=None, count=10, client=None, **limits):
+        '''
+        limits: rate limits for each updater, see `OSCSendUpdater`
+        '''
         self.osc = osc
         self.sends = []
         self.count = count
         self.client = client
+        self.limits = limits
         if sends is not None:
             self.add_dict(sends, self.count, self.client)
 
@@ -882,17 +2335,23 @@ class OSCSendUpdaters:
         {a: self.add(a, f, count=count, client=client)
                      for a, f in sends.items()}
 
-    def add(self, address, function, state=None, count=None, update=False, client=None):
+    def add(self, address, function, state=None, count=None, update=False, client=None,
+            **limits):
         if count is None:
             count = self.count
         if client is None:
             client = self.client
+        limits = {**self.limits, **limits}
         self.sends.append(
-            OSCSendUpdater(self.osc, address, function, count, client))
+            OSCSendUpdater(self.osc, address, function, count, client, **limits))
 
     def __call__(self):
         [s() for s in self.sends]
 
+    def stats(self):
+        '''counts of sends made and suppressed, by address'''
+        return {s.address: s.stats() for s in self.sends}
+
 
 class OSCUpdaters:
     '''
@@ -910,14 +2369,21 @@ class OSCUpdaters:
     def __init__(self, osc,
                  sends=None, receives=None,
                  send_count=60, receive_count=10,
-                 client=None):
+                 client=None, send_limits=None, receive_limits=None):
+        '''
+        send_limits: dict of rate limits for sends, see `OSCSendUpdater`
+        receive_limits: dict of rate limits for receives, see `ReceiveUpdater`
+            e.g. `send_limits=dict(hz=30, epsilon=1e-3, max_interval=1)`
+        '''
         self.osc = osc
         self.client = client
         self.send_count = send_count
         self.receive_count = receive_count
         self.sends = OSCSendUpdaters(
-            self.osc, count=self.send_count, client=self.client)
-        self.receives = OSCReceiveUpdaters(self.osc, count=self.receive_count)
+            self.osc, count=self.send_count, client=self.client,
+            **(send_limits or {}))
+        self.receives = OSCReceiveUpdaters(
+            self.osc, count=self.receive_count, **(receive_limits or {}))
         if sends is not None:
             self.add_sends(sends)
         if receives is not None:
@@ -950,3 +2416,7 @@ class OSCUpdaters:
     def __call__(self):
         self.sends()
         self.receives()
+
+    def stats(self):
+        '''counts of updates made and suppressed, by address'''
+        return {'sends': self.sends.stats(), 'receives': self.receives.stats()}
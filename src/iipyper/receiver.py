@@ -0,0 +1,142 @@
+import os
+import socket
+import select
+import traceback
+from threading import Thread
+
+def set_rcvbuf(sock:socket.socket, size:int) -> int:
+    """
+    request a socket receive buffer (SO_RCVBUF) of `size` bytes.
+
+    the kernel may clamp it (on Linux, to net.core.rmem_max)
+    or adjust it (Linux doubles it for bookkeeping).
+
+    Returns:
+        the size actually set
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+def udp_socket_info(sock:socket.socket) -> dict:
+    """
+    kernel counters for a UDP socket, from /proc/net/udp on Linux:
+    'rx_queue' (bytes waiting to be read) and 'kernel_drops'
+    (datagrams dropped, e.g. because the receive buffer was full).
+
+    Returns:
+        dict of counters, which are None where not available
+    """
+    info = {'rx_queue': None, 'kernel_drops': None}
+    try:
+        inode = str(os.fstat(sock.fileno()).st_ino)
+        for path in ('/proc/net/udp', '/proc/net/udp6'):
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    if fields[9] == inode:
+                        info['rx_queue'] = int(fields[4].split(':')[1], 16)
+                        info['kernel_drops'] = int(fields[12])
+                        return info
+    except (OSError, ValueError, IndexError):
+        pass
+    return info
+
+class UDPReceiver:
+    """
+    receive loop for a UDP socket, which on each wakeup reads every
+    datagram waiting (up to `batch` at a time) without blocking,
+    before handling them.
+
+    reading in batches empties the kernel buffer faster than handling each
+    datagram as it is read, so bursts are less likely to overflow it.
+    """
+    def __init__(self, host:str, port:int, handle_packet,
+            rcvbuf:int=None, batch:int=64, name:str='iipyper UDP receiver'):
+        """
+        Args:
+            host: IP address to receive on
+            port: port to receive on
+            handle_packet: called with (data, sender address) for each datagram
+            rcvbuf: if given, size of the socket receive buffer in bytes
+            batch: max number of datagrams to read before handling them
+            name: name of the thread
+        """
+        self.handle_packet = handle_packet
+        self.batch = batch
+        family = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0][0]
+        self.socket = socket.socket(family, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        if rcvbuf is not None:
+            set_rcvbuf(self.socket, rcvbuf)
+        self.running = True
+        self.packets = 0
+        self.bytes = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.errors = 0
+        self.thread = Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        """read up to `batch` waiting datagrams"""
+        recvfrom = self.socket.recvfrom
+        packets = []
+        try:
+            for _ in range(self.batch):
+                packets.append(recvfrom(65536))
+        except (BlockingIOError, InterruptedError):
+            pass
+        return packets
+
+    def _run(self):
+        sock = self.socket
+        handle_packet = self.handle_packet
+        while self.running:
+            try:
+                readable, _, _ = select.select((sock,), (), (), 0.1)
+            except (OSError, ValueError):
+                # closed
+                break
+            if not readable:
+                continue
+            # drain everything waiting before blocking again
+            while True:
+                try:
+                    packets = self._read()
+                except OSError:
+                    if not self.running:
+                        return
+                    self.errors += 1
+                    traceback.print_exc()
+                    break
+                if not packets:
+                    break
+                self.batches += 1
+                self.max_batch = max(self.max_batch, len(packets))
+                self.packets += len(packets)
+                for data, address in packets:
+                    self.bytes += len(data)
+                    try:
+                        handle_packet(data, address)
+                    except Exception:
+                        self.errors += 1
+                        traceback.print_exc()
+                if len(packets) < self.batch:
+                    break
+
+    def stats(self) -> dict:
+        return {
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'batches': self.batches,
+            'max_batch': self.max_batch,
+            'errors': self.errors,
+        }
+
+    def close(self):
+        self.running = False
+        self.socket.close()
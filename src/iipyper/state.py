@@ -1,7 +1,26 @@
-from threading import RLock, Lock
+import asyncio
+from threading import RLock, Lock, Thread
 
 # _lock = Lock()
 
 # using a reentrant lock should allow the user to lock around something
 # which may be called from a @repeat, MIDI handler, etc without stalling
-_lock = RLock()
\ No newline at end of file
+_lock = RLock()
+
+# asyncio event loop shared by `async def` handlers and asyncio OSC servers.
+# runs on its own thread, started when first needed
+_loop = None
+_loop_lock = Lock()
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            Thread(target=_loop.run_forever, daemon=True).start()
+        return _loop
+
+def _stop_loop():
+    with _loop_lock:
+        if _loop is not None:
+            _loop.call_soon_threadsafe(_loop.stop)
@@ -1,5 +1,8 @@
 import time
-from threading import Timer as _Timer
+import heapq
+import itertools
+import traceback
+from threading import Timer as _Timer, Thread, Condition
 
 from .util import maybe_lock
     
@@ -42,4 +45,85 @@ class Timer:
     def cancel(self):
         self.timer.cancel()
     def start(self):
-        self.timer.start()
\ No newline at end of file
+        self.timer.start()
+
+class Scheduler:
+    """calls functions at given times, on its own thread.
+    
+    like `repeat`, sleeps until shortly before each deadline and then
+    spinlocks for the remainder for more precise timing.
+    """
+    def __init__(self, tick:float=5e-3, name:str='iipyper scheduler'):
+        """
+        Args:
+            tick: minimum interval to sleep for 
+                (will spinlock for the remainder for more precise timing)
+                if None, always sleep
+        """
+        self.tick = tick
+        # (deadline as perf_counter, sequence number, function, arguments)
+        self.heap = []
+        self.cond = Condition()
+        self.seq = itertools.count()
+        self.scheduled = 0
+        self.late = 0
+        self.dispatched = 0
+        self.max_late = 0.0
+        self.max_jitter = 0.0
+        Thread(target=self._run, name=name, daemon=True).start()
+
+    def at(self, t:float, f, *a):
+        """call `f(*a)` at time `t`.
+
+        Args:
+            t: time in seconds since the epoch (as from `time.time()`).
+                if `t` has already passed, it is counted as late and
+                `f` is called immediately on the calling thread.
+        """
+        delay = t - time.time()
+        if delay <= 0:
+            self.late += 1
+            self.max_late = max(self.max_late, -delay)
+            f(*a)
+            return
+        deadline = time.perf_counter() + delay
+        with self.cond:
+            heapq.heappush(self.heap, (deadline, next(self.seq), f, a))
+            self.scheduled += 1
+            self.cond.notify()
+
+    def pending(self) -> int:
+        """number of calls waiting"""
+        return len(self.heap)
+
+    def stats(self) -> dict:
+        return {
+            'pending': self.pending(),
+            'scheduled': self.scheduled,
+            'dispatched': self.dispatched,
+            'late': self.late,
+            'max_late': self.max_late,
+            'max_jitter': self.max_jitter,
+        }
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.heap:
+                    self.cond.wait()
+                deadline = self.heap[0][0]
+                wait = deadline - time.perf_counter()
+                sleep = wait if self.tick is None else wait - self.tick
+                if sleep > 0:
+                    # wake early if something sooner is scheduled
+                    self.cond.wait(sleep)
+                    continue
+                _, _, f, a = heapq.heappop(self.heap)
+            while time.perf_counter() < deadline: pass
+            self.max_jitter = max(
+                self.max_jitter, time.perf_counter() - deadline)
+            try:
+                f(*a)
+            except Exception:
+                traceback.print_exc()
+            self.dispatched += 1
@@ -3,8 +3,10 @@
 """
 
 from typing import NewType, List, Tuple, TypeVar, Iterable, Any, Dict, Optional, Union
+import typing
 from typing_extensions import TypeAliasType
 import json
+import struct
 
 import numpy as np
 
@@ -63,3 +65,109 @@ def ndarray_from_repr(repr_str: str) -> np.ndarray:
         complex64, complex128,
         int8, int16, int32, int64)
     return eval(repr_str)
+
+
+# iipyper binary ndarray format:
+#   b'iiND', version (uint8), ndim (uint8), length of dtype string (uint8), 0
+#   dtype string as from `numpy.dtype.str`, zero-padded to a multiple of 8 bytes
+#   shape as ndim little-endian uint64
+#   data in C order
+_ndarray_magic = b'iiND'
+_ndarray_version = 1
+
+def is_ndarray_blob(blob: bytes) -> bool:
+    """test if bytes start with the iipyper binary ndarray header"""
+    return blob[:4] == _ndarray_magic
+
+def ndarray_to_blob(array: np.ndarray) -> bytes:
+    """encode an array as bytes with a header describing dtype and shape.
+    
+    see `ndarray_from_blob`.
+    """
+    # not np.ascontiguousarray, which makes 0-d arrays 1-d
+    array = np.require(array, requirements='C')
+    if array.dtype.hasobject:
+        raise ValueError('ndarray_to_blob: object arrays are not supported')
+    dtype = array.dtype.str.encode('ascii')
+    header = struct.pack(
+        '<4sBBBx', _ndarray_magic, _ndarray_version, array.ndim, len(dtype))
+    pad = -len(dtype) % 8
+    shape = struct.pack(f'<{array.ndim}Q', *array.shape)
+    return b''.join((header, dtype, b'\x00'*pad, shape, array.data))
+
+def ndarray_from_blob(blob: bytes) -> np.ndarray:
+    """decode bytes made by `ndarray_to_blob`.
+
+    the result is a view over `blob` with no copy, 
+    so it is read-only if `blob` is a `bytes`.
+    """
+    magic, version, ndim, n = struct.unpack_from('<4sBBBx', blob)
+    if magic != _ndarray_magic or version != _ndarray_version:
+        raise ValueError('ndarray_from_blob: not an iipyper ndarray blob')
+    offset = 8
+    dtype = np.dtype(bytes(blob[offset:offset+n]).decode('ascii'))
+    offset += n + (-n % 8)
+    shape = struct.unpack_from(f'<{ndim}Q', blob, offset)
+    offset += 8*ndim
+    # data runs to the end
+    size = dtype.itemsize
+    for d in shape:
+        size *= d
+    if len(blob) - offset != size:
+        raise ValueError(
+            f'ndarray_from_blob: {len(blob) - offset} bytes of data '
+            f'for shape {shape} of {dtype}')
+    return np.ndarray(shape, dtype, buffer=blob, offset=offset)
+
+class Shape:
+    """
+    array shape for `NDArray` or pydantic_numpy array annotations, 
+    with None for any size, e.g. `Annotated[Np2DArrayFp32, Shape(None, 3)]`.
+
+    arrays of other shapes are rejected when decoding OSC items,
+    and by 'fast' and 'strict' validation.
+    """
+    def __init__(self, *shape:Optional[int]):
+        self.shape = shape
+
+    def matches(self, shape:Tuple[int, ...]) -> bool:
+        return len(shape) == len(self.shape) and all(
+            n is None or n == m for n, m in zip(self.shape, shape))
+
+    def check(self, a:np.ndarray) -> np.ndarray:
+        if not self.matches(a.shape):
+            raise ValueError(f'expected array of shape {self}, got {a.shape}')
+        return a
+
+    def __get_pydantic_core_schema__(self, source, handler):
+        from pydantic_core import core_schema
+        return core_schema.no_info_after_validator_function(
+            self.check, handler(source))
+
+    def __repr__(self):
+        return repr(tuple(self.shape)).replace('None', '*')
+
+def _ndarray_annotation(cls) -> Optional[
+        Tuple[Optional[np.dtype], Optional[int], Optional[Shape]]]:
+    """
+    if `cls` is `NDArray` or another pydantic_numpy array type,
+    return its (dtype, number of dimensions, `Shape`), any of which may be None.
+    otherwise return None.
+    """
+    if typing.get_origin(cls) is not typing.Annotated:
+        return None
+    array_type, *meta = typing.get_args(cls)
+    if typing.get_origin(array_type) is not np.ndarray:
+        return None
+    dtype = ndim = shape = None
+    for m in meta:
+        if isinstance(m, Shape):
+            shape = m
+            continue
+        dtype = getattr(m, 'data_type', None) or dtype
+        ndim = getattr(m, 'dimensions', None) or ndim
+    if dtype is not None:
+        dtype = np.dtype(dtype)
+    if shape is not None:
+        ndim = len(shape.shape)
+    return dtype, ndim, shape
@@ -0,0 +1,374 @@
+import time
+import traceback
+from queue import Queue, Full, SimpleQueue
+from threading import Thread, Condition
+from collections import deque
+
+from .metrics import Histogram
+
+class WorkerPool:
+    """
+    fixed number of worker threads, each fed by its own bounded queue.
+
+    work submitted with the same key always goes to the same worker,
+    so it runs in the order it was submitted. work without a key goes to
+    the least busy worker. when a queue is full, work is rejected and counted
+    rather than blocking the caller.
+    """
+    def __init__(self, workers:int=4, queue_size:int=1024, name:str='iipyper'):
+        """
+        Args:
+            workers: number of threads
+            queue_size: max number of waiting items per worker
+            name: prefix for thread names
+        """
+        assert workers > 0
+        self.queue_size = queue_size
+        self.queues = [Queue(queue_size) for _ in range(workers)]
+        self.submitted = 0
+        self.rejected = 0
+        self.max_depth = 0
+        # per worker, so each counter is only written from one thread
+        self.completed = [0]*workers
+        self.errors = [0]*workers
+        self.wait_total = [0.0]*workers
+        self.wait_max = [0.0]*workers
+        self.threads = [
+            Thread(
+                target=self._work, args=(i,),
+                name=f'{name} worker {i}', daemon=True)
+            for i in range(workers)]
+        for th in self.threads:
+            th.start()
+
+    def submit(self, f, *a, key=None) -> bool:
+        """
+        queue `f(*a)` to be called on a worker thread.
+
+        Args:
+            key: if given, work with equal keys runs in order on one worker
+
+        Returns:
+            False if the work was rejected because the queue was full
+        """
+        if key is None:
+            q = min(self.queues, key=Queue.qsize)
+        else:
+            q = self.queues[hash(key) % len(self.queues)]
+        try:
+            q.put_nowait((f, a, time.perf_counter()))
+        except Full:
+            self.rejected += 1
+            return False
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, q.qsize())
+        return True
+
+    def depth(self) -> int:
+        """number of items waiting in all queues"""
+        return sum(q.qsize() for q in self.queues)
+
+    def stats(self) -> dict:
+        completed = sum(self.completed)
+        return {
+            'workers': len(self.threads),
+            'depth': self.depth(),
+            'max_depth': self.max_depth,
+            'submitted': self.submitted,
+            'rejected': self.rejected,
+            'completed': completed,
+            'errors': sum(self.errors),
+            'mean_wait': sum(self.wait_total) / max(1, completed),
+            'max_wait': max(self.wait_max),
+        }
+
+    def close(self):
+        """stop the workers after the work already queued"""
+        for q in self.queues:
+            q.put(None)
+
+    def _work(self, i):
+        q = self.queues[i]
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            f, a, t = item
+            wait = time.perf_counter() - t
+            self.wait_total[i] += wait
+            self.wait_max[i] = max(self.wait_max[i], wait)
+            try:
+                f(*a)
+            except Exception:
+                self.errors[i] += 1
+                traceback.print_exc()
+            self.completed[i] += 1
+
+# priority classes for `Lanes`, served in this order
+priorities = {'control': 0, 'default': 1, 'bulk': 2}
+_policies = ('drop-oldest', 'drop-newest', 'coalesce')
+
+class RouteQueue:
+    """
+    bounded queue of work for one route, see `Lanes`.
+
+    when full, 'drop-oldest' discards the oldest waiting item, 'drop-newest'
+    discards the new one, and 'coalesce' keeps only the latest item for each
+    key (discarding new keys when full).
+    """
+    def __init__(self, name:str, depth:int=64, policy:str='drop-oldest',
+            priority:str|int='default'):
+        if policy not in _policies:
+            raise ValueError(f'RouteQueue: policy should be one of {_policies}')
+        self.name = name
+        self.depth = depth
+        self.policy = policy
+        self.priority = priorities.get(priority, priority)
+        if not isinstance(self.priority, int):
+            raise ValueError(
+                f'RouteQueue: priority should be an int or one of {list(priorities)}')
+        # (enqueue time, key, item); for 'coalesce', key -> (time, item)
+        self.items = deque()
+        self.latest = {}
+        # one worker at a time, to keep the route in order
+        self.busy = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.handled = 0
+        self.max_depth = 0
+        self.residency = Histogram()
+
+    def __len__(self):
+        return len(self.items)
+
+    def head_time(self):
+        t, key, item = self.items[0]
+        return t
+
+    def _put(self, key, item, t) -> bool:
+        """add an item; call with the `Lanes` lock held"""
+        if self.policy == 'coalesce':
+            if key in self.latest:
+                self.latest[key] = item
+                self.coalesced += 1
+                return True
+            if len(self.items) >= self.depth:
+                self.dropped += 1
+                return False
+            self.latest[key] = item
+            self.items.append((t, key, None))
+        else:
+            if len(self.items) >= self.depth:
+                self.dropped += 1
+                if self.policy == 'drop-newest':
+                    return False
+                self.items.popleft()
+            self.items.append((t, key, item))
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self.items))
+        return True
+
+    def _pop(self):
+        """remove the next item; call with the `Lanes` lock held"""
+        t, key, item = self.items.popleft()
+        if item is None:
+            item = self.latest.pop(key)
+        return t, item
+
+    def stats(self) -> dict:
+        return {
+            'priority': self.priority,
+            'policy': self.policy,
+            'depth': len(self.items),
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'handled': self.handled,
+            'residency': self.residency.snapshot(),
+        }
+
+class Lanes:
+    """
+    worker threads serving a set of `RouteQueue`s by priority:
+    a worker takes the oldest waiting item from the highest priority class
+    (lowest number) with work waiting. each route is served by one worker
+    at a time, so it stays in order, and a slow route only holds up its own
+    queue plus one worker.
+    """
+    def __init__(self, workers:int=1, name:str='iipyper lanes'):
+        assert workers > 0
+        self.queues = {}
+        self.cond = Condition()
+        self.threads = [
+            Thread(target=self._work, name=f'{name} {i}', daemon=True)
+            for i in range(workers)]
+        for th in self.threads:
+            th.start()
+
+    def queue(self, name:str, depth:int=64, policy:str='drop-oldest',
+            priority:str|int='default') -> RouteQueue:
+        """add a queue (or get an existing one with the same name)"""
+        with self.cond:
+            q = self.queues.get(name)
+            if q is None:
+                q = self.queues[name] = RouteQueue(name, depth, policy, priority)
+            return q
+
+    def put(self, q:RouteQueue, f, *a, key=None) -> bool:
+        """
+        queue `f(*a)` on route queue `q`.
+
+        Args:
+            key: with 'coalesce', items with equal keys replace each other
+
+        Returns:
+            False if the item was dropped
+        """
+        with self.cond:
+            r = q._put(key, (f, a), time.perf_counter())
+            self.cond.notify()
+        return r
+
+    def _next(self):
+        """the queue to serve next, or None"""
+        best = None
+        for q in self.queues.values():
+            if q.busy or not q.items:
+                continue
+            if (best is None or q.priority < best.priority
+                    or q.priority == best.priority
+                    and q.head_time() < best.head_time()):
+                best = q
+        return best
+
+    def _work(self):
+        while True:
+            with self.cond:
+                q = self._next()
+                while q is None:
+                    self.cond.wait()
+                    q = self._next()
+                t, (f, a) = q._pop()
+                q.busy = True
+            q.residency.record(time.perf_counter() - t)
+            try:
+                f(*a)
+            except Exception:
+                traceback.print_exc()
+            with self.cond:
+                q.busy = False
+                q.handled += 1
+                # the route may have more work for another worker
+                self.cond.notify()
+
+    def stats(self) -> dict:
+        """per-route queue stats, including time spent waiting ('residency')"""
+        return {name: q.stats() for name, q in list(self.queues.items())}
+
+class KeyedQueues:
+    """
+    worker threads running work in order for each key, e.g. a MIDI port.
+
+    work is put on a `SimpleQueue`, which never blocks the caller, and each
+    key always goes to the same worker. counts, queue depth and time spent
+    waiting ('residency') are kept for each key.
+    """
+    def __init__(self, workers:int=1, queue_size:int=1024, name:str='iipyper'):
+        """
+        Args:
+            workers: number of threads
+            queue_size: max number of waiting items per key,
+                beyond which further items are dropped and counted
+            name: prefix for thread names
+        """
+        assert workers > 0
+        self.queue_size = queue_size
+        self.queues = [SimpleQueue() for _ in range(workers)]
+        # key -> _KeyStats
+        self.keys = {}
+        self.threads = [
+            Thread(
+                target=self._work, args=(q,),
+                name=f'{name} worker {i}', daemon=True)
+            for i, q in enumerate(self.queues)]
+        for th in self.threads:
+            th.start()
+
+    def put(self, key, f, *a) -> bool:
+        """
+        queue `f(*a)` to be called on the worker for `key`.
+        should be called from one thread per key.
+
+        Returns:
+            False if the item was dropped because the key's queue was full
+        """
+        s = self.keys.get(key)
+        if s is None:
+            s = self.keys.setdefault(key, _KeyStats())
+        depth = s.enqueued - s.handled
+        if depth >= self.queue_size:
+            s.dropped += 1
+            return False
+        s.enqueued += 1
+        if depth >= s.max_depth:
+            s.max_depth = depth + 1
+        self.queues[hash(key) % len(self.queues)].put(
+            (s, f, a, time.perf_counter()))
+        return True
+
+    def stats(self) -> dict:
+        """stats for each key"""
+        return {k: s.snapshot() for k, s in list(self.keys.items())}
+
+    def error(self, key):
+        """
+        count an error for `key`, for work which handles its own exceptions.
+        should be called from the work itself.
+        """
+        self.keys[key].errors += 1
+
+    def close(self):
+        """stop the workers after the work already queued"""
+        for q in self.queues:
+            q.put(None)
+
+    def _work(self, q):
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            s, f, a, t = item
+            s.residency.record(time.perf_counter() - t)
+            try:
+                f(*a)
+            except Exception:
+                s.errors += 1
+                traceback.print_exc()
+            s.handled += 1
+
+class _KeyStats:
+    """counters for one key of `KeyedQueues`.
+    `enqueued` and `dropped` are written by the producer, the rest by the worker.
+    """
+    __slots__ = (
+        'enqueued', 'dropped', 'handled', 'errors', 'max_depth', 'residency')
+    def __init__(self):
+        self.enqueued = 0
+        self.dropped = 0
+        self.handled = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.residency = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            'depth': self.enqueued - self.handled,
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'handled': self.handled,
+            'errors': self.errors,
+            'residency': self.residency.snapshot(),
+        }
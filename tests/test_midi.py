@@ -0,0 +1,300 @@
+import random
+
+import mido
+
+from iipyper.midi import _get_filter
+from iipyper.dispatch import MIDIDispatcher
+
+def _scan(handlers, port, msg):
+    """handlers matching msg, by testing every filter (as `MIDI` used to)"""
+    matched = []
+    for handler in handlers:
+        filters = handler[0].copy()
+        ok = 'port' not in filters or port in filters.pop('port')
+        ok &= ('ignore_port' not in filters
+            or port not in filters.pop('ignore_port'))
+        ok &= all(
+            filt is None or not hasattr(msg, k) or getattr(msg, k) in filt
+            for k, filt in filters.items())
+        if ok:
+            matched.append(handler)
+    return matched
+
+def _random_filters(r):
+    choices = {
+        'port': ['a', 'b'],
+        'ignore_port': ['b'],
+        'type': ['note_on', 'note_off', 'cc', 'pitchwheel', 'clock'],
+        'channel': list(range(3)),
+        'note': list(range(4)),
+        'control': list(range(4)),
+        'velocity': [0, 64, 127],
+        'value': [0, 64, 127],
+    }
+    filters = {}
+    for k, values in choices.items():
+        if r.random() < 0.3:
+            filters[k] = _get_filter(r.sample(values, min(len(values), r.randint(1, 2))))
+    if r.random() < 0.1:
+        filters['channel'] = None
+    return filters
+
+def _random_msg(r):
+    t = r.choice(['note_on', 'note_off', 'control_change', 'pitchwheel', 'clock'])
+    if t in ('note_on', 'note_off'):
+        return mido.Message(t, channel=r.randrange(3),
+            note=r.randrange(4), velocity=r.choice([0, 64, 127]))
+    if t == 'control_change':
+        return mido.Message(t, channel=r.randrange(3),
+            control=r.randrange(4), value=r.choice([0, 64, 127]))
+    if t == 'pitchwheel':
+        return mido.Message(t, channel=r.randrange(3), pitch=0)
+    return mido.Message(t)
+
+def test_midi_dispatcher():
+    r = random.Random(0)
+    d = MIDIDispatcher()
+    for i in range(50):
+        d.add((_random_filters(r), i))
+    for _ in range(2000):
+        msg = _random_msg(r)
+        port = r.choice(['a', 'b', 'c'])
+        found = [
+            handler for residual, handler in d.handlers_for(port, msg)
+            if all(getattr(msg, k) in filt for k, filt, _ in residual)]
+        assert found == _scan(d.handlers, port, msg)
+
+    # the index is rebuilt when a handler is added
+    msg = mido.Message('clock')
+    n = len(d.handlers_for('a', msg))
+    d.add(({}, 'all'))
+    assert len(d.handlers_for('a', msg)) == n+1
+
+    # a handler added during a lookup isn't missed by later lookups
+    d = MIDIDispatcher()
+    d.add(({}, 'first'))
+    resolve = d._resolve
+    def racing(key):
+        r = resolve(key)
+        d.add(({}, 'second'))
+        return r
+    d._resolve = racing
+    assert [h[1] for _, h in d.handlers_for('a', msg)] == ['first']
+    d._resolve = resolve
+    assert [h[1] for _, h in d.handlers_for('a', msg)] == ['first', 'second']
+
+def test_feedback_filter():
+    from iipyper.midi import FeedbackFilter
+
+    ms = 1_000_000
+    fb = FeedbackFilter(window=1e-3, slots=4, depth=2, probe=4)
+    note = mido.Message('note_on', note=60, velocity=0).bytes()
+    note_off = mido.Message('note_off', note=60, velocity=0).bytes()
+    other = mido.Message('note_on', note=61, velocity=10).bytes()
+
+    # each send suppresses one arrival within the window
+    fb.sent(note, 0)
+    fb.sent(note, 0)
+    fb.sent(note, 0) # overwrites the oldest
+    assert fb.received(note_off, ms//2)
+    assert fb.received(note, ms//2)
+    assert not fb.received(note, ms//2)
+    assert not fb.received(other, ms//2)
+
+    # expired sends are discarded
+    fb.sent(other, 0)
+    assert not fb.received(other, 2*ms)
+    assert fb.stats()['keys'] == 0
+
+    # bounded: the oldest key is evicted when all slots are in use
+    for i in range(5):
+        fb.sent([0x90, i, 100], i)
+    assert not fb.received([0x90, 0, 100], 10)
+    assert fb.received([0x90, 4, 100], 10)
+    stats = fb.stats()
+    assert stats['evicted'] == 1 and stats['overwritten'] == 1
+    assert stats['keys'] == 3 and stats['expired'] == 1
+
+def test_keyed_queues():
+    import time
+    from threading import Event
+    from iipyper.workers import KeyedQueues
+
+    # int keys 0 and 1 go to different workers
+    queues = KeyedQueues(workers=2, queue_size=4)
+    go = Event()
+    done = []
+    queues.put(0, go.wait)
+    for i in range(5):
+        queues.put(0, done.append, (0, i))
+    for i in range(4):
+        queues.put(1, done.append, (1, i))
+    time.sleep(0.05)
+    # key 1 isn't held up by key 0
+    assert done == [(1, i) for i in range(4)]
+    go.set()
+    time.sleep(0.05)
+
+    assert done[4:] == [(0, i) for i in range(3)]
+    stats = queues.stats()
+    assert stats[0]['dropped'] == 2 and stats[0]['max_depth'] == 4
+    assert stats[0]['handled'] == 4 and stats[0]['depth'] == 0
+    assert stats[0]['residency']['max'] > 0.04
+    assert stats[1]['dropped'] == 0 and stats[1]['handled'] == 4
+    queues.close()
+
+def test_queued_dispatch():
+    import time
+    from threading import Event
+
+    midi = _midi(dispatch='queued', workers=2, queue_size=4)
+    go = Event()
+    rcv = []
+
+    @midi.handle(type='note_on')
+    def notes(msg, port):
+        go.wait()
+        if msg.note == 0:
+            raise ValueError
+        rcv.append((port, msg.note))
+
+    a, b = midi.get_callback('a'), midi.get_callback('b')
+    for note in range(6):
+        a(mido.Message('note_on', note=note, velocity=1))
+    for note in range(3):
+        b(mido.Message('note_on', note=note, velocity=1))
+    go.set()
+    time.sleep(0.05)
+
+    # each port's messages stay in order
+    assert [n for p, n in rcv if p == 'a'] == [1, 2, 3]
+    assert [n for p, n in rcv if p == 'b'] == [1, 2]
+    stats = midi.queue_stats()
+    assert stats['a']['dropped'] == 2 and stats['b']['dropped'] == 0
+    assert stats['a']['handled'] == 4 and stats['b']['handled'] == 3
+    assert stats['a']['errors'] == 1 and stats['b']['errors'] == 1
+    midi.queues.close()
+
+class _FakeRtMidi:
+    def __init__(self):
+        self.sent = []
+    def send_message(self, data):
+        self.sent.append(list(data))
+
+class _FakeOutput:
+    """stands in for a mido rtmidi output port"""
+    def __init__(self):
+        from threading import RLock
+        self._send_lock = RLock()
+        self._rt = _FakeRtMidi()
+    def send(self, msg):
+        with self._send_lock:
+            self._rt.send_message(msg.bytes())
+
+def _midi(**kw):
+    from iipyper.midi import MIDI
+    # no ports are opened
+    return MIDI(
+        in_ports=['none'], virtual_in_ports=0, virtual_out_ports=0,
+        verbose=0, **kw)
+
+def test_send_raw():
+    import numpy as np
+
+    midi = _midi()
+    out = midi.out_ports['out'] = _FakeOutput()
+    midi.send_raw(b'\x90\x3c\x64')
+    midi.send_batch([(0x90, 64, 100), [0x90, 67, 100]])
+    sweep = np.zeros((3, 3), np.uint8)
+    sweep[:, 0] = 0xb2
+    sweep[:, 2] = np.arange(3)
+    midi.send_batch(sweep, port='out')
+    midi.note_off(note=60)
+    assert out._rt.sent == [
+        [0x90, 60, 100], [0x90, 64, 100], [0x90, 67, 100],
+        [0xb2, 0, 0], [0xb2, 0, 1], [0xb2, 0, 2], [0x80, 60, 64]]
+
+    # raw sends are recognized as feedback
+    assert midi.feedback.received([0x90, 67, 100])
+    assert midi.feedback.received([0xb2, 0, 2])
+    assert midi.feedback.received(mido.Message('note_off', note=60).bytes())
+
+class _FakeInput:
+    """stands in for a mido rtmidi input port"""
+    def __init__(self):
+        from threading import RLock
+        self._callback_lock = RLock()
+        self._rt = self
+        self.callback = None
+    def cancel_callback(self):
+        self.callback = None
+    def set_callback(self, f):
+        self.callback = f
+
+def test_raw_receive():
+    from iipyper.midi import MIDIEvent
+
+    midi = _midi(raw_input=True)
+    port = _FakeInput()
+    midi._set_raw_callback('in', port)
+    rcv = []
+
+    @midi.handle(raw=True, type='note_on', velocity=range(1, 128))
+    def raw_notes(e):
+        rcv.append(e)
+
+    @midi.handle(raw=True, type='clock')
+    def raw_clock(e, port):
+        rcv.append((e.status, port))
+
+    @midi.handle(type='cc', control=7)
+    def mido_cc(msg):
+        rcv.append(msg)
+
+    for data in ([0x91, 60, 100], [0x91, 60, 0], [0xf8],
+            [0xb2, 7, 64], [0xb2, 8, 64]):
+        port.callback((data, 0.0), None)
+
+    event = rcv[0]
+    assert isinstance(event, MIDIEvent)
+    assert event[:4] == (0x90, 1, 60, 100)
+    assert rcv[1] == (0xf8, 'in')
+    assert rcv[2] == mido.Message('control_change', channel=2, control=7, value=64)
+    assert len(rcv) == 3
+
+    # sent messages are suppressed
+    midi.out_ports['out'] = _FakeOutput()
+    midi.send_raw([0x91, 61, 100])
+    port.callback(([0x91, 61, 100], 0.0), None)
+    assert len(rcv) == 3
+
+    # raw handlers also work with mido input
+    midi._dispatch(mido.Message('note_on', channel=3, note=62, velocity=5), 'in')
+    assert rcv[3][:4] == (0x90, 3, 62, 5)
+
+    # bytes mido can't parse skip mido handlers, but not raw handlers
+    midi = _midi(raw_input=True)
+    midi._set_raw_callback('in', port)
+    rcv = []
+
+    @midi.handle
+    def any_mido(msg):
+        rcv.append(msg)
+
+    @midi.handle(raw=True)
+    def any_raw(e):
+        rcv.append(e)
+
+    port.callback(([0x90, 200, 100], 0.0), None)
+    assert len(rcv) == 1 and rcv[0][:4] == (0x90, 0, 200, 100)
+
+def test_feedback_filter_burst():
+    from iipyper.midi import FeedbackFilter
+
+    # notes sharing a status and velocity should spread over the table
+    fb = FeedbackFilter(window=1e-3, slots=1024)
+    offs = [[0x80, note, 0] for note in range(128)]
+    for data in offs:
+        fb.sent(data, 0)
+    assert all(fb.received(data, 1000) for data in offs)
+    assert fb.stats()['evicted'] == 0
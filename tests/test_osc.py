@@ -1,9 +1,11 @@
 import pytest
 import time
+import inspect
 from collections import defaultdict
 
 from iipyper import OSC
 from iipyper.types import *
+from pydantic_numpy.typing import Np2DArrayFp32, NpNDArrayInt16
 
 @pytest.fixture(scope='module')
 def setup_osc():
@@ -149,3 +151,868 @@ def test_wildcard(setup_osc, case):
         assert r in pos, f'for {address=}, message {r} should not have been received'
 
 
+
+def _f_varp(route, *items): pass
+def _f_pos(route, a, b:object, c=None): pass
+def _f_kw(route, a=0, b:Splat[2]=(0,0), **kw): pass
+def _f_splat(route, x:Splat[3], *items, y:Splat[None]=[], z:object=None): pass
+def _f_nd(route, a:NDArray, b:int=0): pass
+
+@pytest.mark.parametrize('case', [
+    (_f_varp, (777, None, 'abc', [1,2,3], '%JSON:{"a":1}')),
+    (_f_pos, (0, '{"k":[1]}')),
+    (_f_pos, (0, '[1]', 'c', 2)),
+    (_f_pos, ('b', '0', 'a', 1)),
+    (_f_pos, (0, 1, 2, 3)),
+    (_f_kw, ('a', 1, 'b', 2, 3, 'other', 4)),
+    (_f_kw, ('b', 2)),
+    (_f_splat, (1, 2, 3, 'a', 'b', 'y', 4, 5, 'z', '{}')),
+    (_f_splat, (1, 2)),
+    (_f_nd, ('{"data":[1,2]}', 'b', 3)),
+    (_f_nd, ('[1,2]',)),
+    (_f_nd, (np.ones(2, dtype=np.float32).tobytes(),)),
+    (_f_nd, (ndarray_to_blob(np.eye(2)), 'b', 1)),
+])
+def test_compiled_parser(case):
+    # precompiled parser agrees with the interpreted parser
+    from iipyper.osc import _OSCParser, _parse_osc_items, _signature_info
+    f, items = case
+    sig_info, all_default = _signature_info(inspect.signature(f))
+    for allow_kw in (True, False):
+        try:
+            expected = _parse_osc_items(
+                items, sig_info, not all_default, allow_kw, 0)
+        except Exception:
+            # handler reports any parse failure as a ValueError
+            with pytest.raises(Exception):
+                _OSCParser(sig_info, not all_default, allow_kw)(items)
+            continue
+        args, kw = _OSCParser(sig_info, not all_default, allow_kw)(items)
+        assert repr((args, kw)) == repr(expected)
+
+@pytest.mark.parametrize('validate', ['off', 'fast', 'strict'])
+def test_validate(setup_osc, validate):
+    osc = setup_osc
+
+    status = {}
+
+    @osc.handle(f'/validate_{validate}', validate=validate)
+    def _(route, a:float, b:Splat[2], c:int=0):
+        status['rcv'] = (a, b, c)
+
+    osc.send(f'/validate_{validate}', 1, 2, 3, 'c', '4')
+
+    time.sleep(0.02)
+    assert 'rcv' in status, 'OSC not received'
+    a, b, c = status['rcv']
+    if validate=='off':
+        assert (a, b, c) == (1, [2, 3], '4')
+    else:
+        assert type(a) is float and a == 1.0
+        assert b == (2, 3)
+        assert type(c) is int and c == 4
+
+@pytest.mark.parametrize('case', [
+    (int, 3, 3), (int, 2.0, 2), (int, True, 1), (int, '4', 4),
+    (int, 2.9, None), (int, float('inf'), None), (int, 'x', None), 
+    (int, b'ab', None), (int, None, None),
+    (float, 2, 2.0), (float, 2.5, 2.5), 
+    (float, b'ab', None), (float, 'x', None), (float, None, None),
+    (str, 'x', 'x'), (str, 3, None), (str, 2.5, None), (str, None, None),
+    (bool, True, True), (bool, False, False), (bool, 0, False), (bool, 1, True),
+    (bool, 2, None), (bool, 2.9, None), (bool, 'x', None), (bool, None, None),
+])
+def test_fast_validate(case):
+    # 'fast' validation accepts and rejects the same values as 'strict'
+    import pydantic
+    from iipyper.osc import _fast_validate, _CoercionError
+    cls, value, expected = case
+    def f(route, x): 
+        return x
+    f.__annotations__ = {'x': cls}
+    fast = _fast_validate(f, inspect.signature(f))
+    strict = pydantic.validate_call(f)
+    if expected is None:
+        with pytest.raises(_CoercionError):
+            fast('/x', value)
+        with pytest.raises(pydantic.ValidationError):
+            strict('/x', value)
+    else:
+        for r in (fast('/x', value), strict('/x', value)):
+            assert type(r) is cls and r == expected
+
+def test_fast_validate_stricter():
+    # 'fast' doesn't parse strings as bools or floats, or decode bytes
+    from iipyper.osc import _fast_validate, _CoercionError
+    def f(route, a:bool=True, b:float=0.0, c:str=''): 
+        return a, b, c
+    fast = _fast_validate(f, inspect.signature(f))
+    for kw in ({'a': 'false'}, {'b': '1.5'}, {'c': b'ab'}):
+        with pytest.raises(_CoercionError):
+            fast('/x', **kw)
+
+def test_dispatcher():
+    # OSCDispatcher resolves the same handlers as the python-osc Dispatcher
+    from pythonosc.dispatcher import Dispatcher
+    from iipyper.dispatch import OSCDispatcher
+
+    mapped = [
+        '/a', '/a/*', '/*/b', '/a/*/b', '/a/**/b', '/a*/b', '/a/b', 
+        '/a/b/c', '/x.y', '*', '/a', '/b/c*d/*']
+    incoming = [
+        '/a', '/a/b', '/a/', '/a/b/c/', '/a/c/b', '//b', '/a//b', '/a/c/d/b',
+        '/ac/b', '/a/b/c', '/x.y', '/xzy', '/b/cd/e', '/b/cxd', 'a', '/',
+        '/a/?', '/a/*', '/*/b', '/nothing']
+
+    for default in (None, print):
+        reference = Dispatcher()
+        dispatcher = OSCDispatcher(cache_size=4)
+        for d in (reference, dispatcher):
+            d.set_default_handler(default)
+            for i, address in enumerate(mapped):
+                d.map(address, print, i)
+        for _ in range(2): # once uncached, once cached
+            for address in incoming:
+                expected = list(reference.handlers_for_address(address))
+                assert list(dispatcher.handlers_for_address(address)) == expected, address
+
+    # mapping a new address invalidates the cache
+    for d in (reference, dispatcher):
+        d.map('/nothing', print)
+    expected = list(reference.handlers_for_address('/nothing'))
+    assert list(dispatcher.handlers_for_address('/nothing')) == expected
+
+def test_asyncio_backend():
+    import asyncio
+    osc = OSC(port=9998, backend='asyncio', verbose=0)
+    osc.create_client('self', '127.0.0.1', 9998)
+
+    n = 100
+    done = set()
+    replies = set()
+
+    @osc.handle(return_port=9998)
+    async def slow(route, i:int):
+        # all of these should be waiting at the same time
+        await asyncio.sleep(0.1)
+        done.add(i)
+        return '/slow_reply', i
+
+    @osc.handle
+    def slow_reply(route, i):
+        replies.add(i)
+
+    for i in range(n):
+        osc.send('/slow', i)
+
+    time.sleep(0.5)
+    assert done == set(range(n))
+    assert replies == set(range(n))
+
+def test_worker_pool():
+    osc = OSC(port=9997, concurrent=4, ordered='route', queue_size=8, verbose=0)
+    osc.create_client('self', '127.0.0.1', 9997)
+
+    rcv = defaultdict(list)
+
+    @osc.handle('/ordered/*', lock=False)
+    def _(route, i):
+        time.sleep(1e-3)
+        rcv[route].append(i)
+
+    # more than the queues can hold
+    n = 50
+    for i in range(n):
+        for route in ('/ordered/a', '/ordered/b'):
+            osc.send(route, i)
+    time.sleep(0.5)
+
+    stats = osc.pool.stats()
+    assert stats['workers'] == 4
+    assert stats['rejected'] > 0
+    assert stats['completed'] + stats['rejected'] == 2*n
+    assert stats['depth'] == 0
+    for items in rcv.values():
+        assert items == sorted(items), 'ordering per route not preserved'
+
+def test_bundle(setup_osc):
+    import socket
+    from pythonosc.osc_packet import OscPacket
+
+    osc = setup_osc
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 9996))
+    sock.settimeout(0.1)
+    osc.create_client('bundle_rx', '127.0.0.1', 9996)
+
+    n = 100
+    t = time.time() + 10
+    with osc.bundle(client='bundle_rx', timetag=t, mtu=512):
+        for i in range(n):
+            osc.send(f'/param/{i}', i, 0.5)
+
+    received = []
+    datagrams = 0
+    try:
+        while True:
+            data = sock.recv(4096)
+            assert len(data) <= 512
+            datagrams += 1
+            received.extend(m.message for m in OscPacket(data).messages)
+    except socket.timeout:
+        pass
+    sock.close()
+
+    assert 1 < datagrams < n
+    assert [m.address for m in received] == [f'/param/{i}' for i in range(n)]
+    assert [m.params for m in received] == [[i, 0.5] for i in range(n)]
+
+def test_timetags(setup_osc):
+    osc = setup_osc
+    stats = osc.scheduler.stats()
+
+    rcv = {}
+
+    @osc.handle
+    def scheduled(route, i):
+        rcv[i] = time.time()
+
+    t = time.time() + 0.1
+    with osc.bundle(client='self', timetag=t):
+        osc.send('/scheduled', 0)
+        osc.send('/scheduled', 1)
+    # late
+    with osc.bundle(client='self', timetag=time.time() - 1):
+        osc.send('/scheduled', 2)
+        osc.send('/scheduled', 3)
+
+    time.sleep(0.02)
+    assert set(rcv) == {2, 3}
+    time.sleep(0.1)
+    assert set(rcv) == {0, 1, 2, 3}
+    assert t <= rcv[0] < t + 0.01
+    assert osc.scheduler.stats()['late'] == stats['late'] + 2
+
+def test_ndarray_blob(setup_osc):
+    osc = setup_osc
+
+    x = np.arange(12, dtype=np.int16).reshape(3, 4)
+    blob = ndarray_to_blob(x)
+    assert is_ndarray_blob(blob)
+    y = ndarray_from_blob(blob)
+    assert y.dtype == x.dtype and (y == x).all()
+    # view over the received bytes
+    assert not y.flags.writeable
+
+    # 0-d, empty and non-contiguous arrays round trip
+    for z in (np.array(3.5, np.float32), np.zeros((0, 3)), np.zeros((2, 0)),
+            np.arange(6.).reshape(2, 3).T):
+        y = ndarray_from_blob(ndarray_to_blob(z))
+        assert y.dtype == z.dtype and y.shape == z.shape and (y == z).all()
+    with pytest.raises(ValueError):
+        ndarray_from_blob(blob[:-1])
+
+    rcv = {}
+
+    @osc.handle
+    def nd_blob(route, a:NDArray, b:Np2DArrayFp32, c:NpNDArrayInt16):
+        rcv['args'] = a, b, c
+
+    raw = np.arange(3, dtype=np.int16).tobytes()
+    osc.send('/nd_blob', blob, blob, raw)
+
+    time.sleep(0.02)
+    assert 'args' in rcv, 'OSC not received'
+    a, b, c = rcv['args']
+    assert a.dtype == np.int16 and a.shape == (3, 4) and (a == x).all()
+    assert not a.flags.writeable, 'matching dtype should not be copied'
+    assert b.dtype == np.float32 and (b == x).all()
+    assert c.dtype == np.int16 and (c == np.arange(3)).all()
+
+@pytest.mark.parametrize('validate', ['off', 'fast', 'strict'])
+def test_ndarray_shape(setup_osc, validate):
+    from typing import Annotated
+    from iipyper.types import Shape
+    osc = setup_osc
+
+    rcv = []
+
+    @osc.handle(f'/nd_shape_{validate}', validate=validate)
+    def _(route, a:Annotated[Np2DArrayFp32, Shape(None, 3)]):
+        rcv.append(a)
+
+    # checked when decoding blobs
+    for shape in ((2, 3), (3, 2), (6,)):
+        x = np.zeros(shape, np.float32)
+        osc.send(f'/nd_shape_{validate}', ndarray_to_blob(x))
+
+    time.sleep(0.05)
+    assert [a.shape for a in rcv] == [(2, 3)]
+
+    # and when validating other values
+    if validate != 'off':
+        from iipyper.osc import _fast_validate
+        f = lambda route, a: a
+        f.__annotations__ = _.__annotations__
+        if validate == 'fast':
+            f = _fast_validate(f, inspect.signature(f))
+        else:
+            import pydantic
+            f = pydantic.validate_call(f)
+        assert f('/x', np.zeros((4, 3), np.float32)).shape == (4, 3)
+        with pytest.raises(ValueError):
+            f('/x', np.zeros((3, 4), np.float32))
+
+def test_ndarray_send(setup_osc):
+    osc = setup_osc
+
+    x = np.random.rand(4, 8).astype(np.float32)
+    rcv = {}
+
+    @osc.handle(return_port=9999)
+    def nd_echo(route, a:NDArray):
+        rcv['a'] = a
+        return '/nd_reply', a, 1
+
+    @osc.handle
+    def nd_reply(route, a:NDArray, b:int):
+        rcv['reply'] = a
+
+    osc.send('/nd_echo', x)
+
+    time.sleep(0.05)
+    assert 'a' in rcv, 'OSC not received'
+    assert rcv['a'].dtype == x.dtype and (rcv['a'] == x).all()
+    assert 'reply' in rcv, 'OSC reply not received'
+    assert rcv['reply'].shape == x.shape and (rcv['reply'] == x).all()
+
+def test_fragments():
+    # arrays larger than a UDP datagram, over loopback
+    # the default receive buffer can't hold all fragments of one message
+    osc = OSC(port=9995, fragment_size=8192, rcvbuf=2**21, verbose=0)
+    osc.create_client('self', '127.0.0.1', 9995)
+
+    x = np.random.rand(65536).astype(np.float32)
+    rcv = []
+
+    @osc.handle
+    def big(route, a:NDArray, i:int):
+        rcv.append((a, i))
+
+    for i in range(3):
+        osc.send('/big', x, i)
+    osc.send('/big', x[:4], 3)
+
+    time.sleep(0.2)
+    assert [i for _,i in rcv] == [0, 1, 2, 3]
+    assert all((a == x[:len(a)]).all() for a,_ in rcv)
+    stats = osc.reassembler.stats()
+    assert stats['completed'] == 3
+    assert stats['pending'] == stats['pending_bytes'] == 0
+
+def test_reassembler():
+    from iipyper.osc import FragmentReassembler
+
+    r = FragmentReassembler(timeout=0.02, max_bytes=10, history=2, overhead=0)
+    assert r.add('a', 1, 2, b'cd') is None
+    assert r.add('a', 1, 2, b'cd') is None # duplicate
+    assert r.add('a', 0, 2, b'ab') == b'abcd'
+    assert r.add('a', 0, 2, b'ab') is None # stale
+    assert r.add('b', 2, 2, b'ab') is None # invalid
+
+    # timeout
+    assert r.add('c', 0, 2, b'ab') is None
+    time.sleep(0.03)
+    assert r.add('c', 1, 2, b'cd') is None
+
+    # memory bound
+    assert r.add('d', 0, 3, b'123456') is None
+    assert r.add('e', 0, 2, b'123456') is None
+    assert r.add('d', 1, 3, b'7') is None
+
+    stats = r.stats()
+    assert stats['completed'] == 1
+    assert stats['timed_out'] == 1
+    assert stats['evicted'] == 1
+    assert stats['stale'] == 4
+    assert stats['invalid'] == 1
+    assert stats['pending'] == 1 and stats['pending_bytes'] == 6
+
+    # claimed fragment counts cost nothing until fragments arrive,
+    # and each fragment held is charged its overhead
+    r = FragmentReassembler(max_bytes=1000, overhead=100)
+    for i in range(20):
+        assert r.add(i, 0, 2**16, b'') is None
+    stats = r.stats()
+    assert stats['pending'] == 10 and stats['pending_bytes'] == 1000
+    assert stats['evicted'] == 10
+
+def test_client_pool():
+    import socket
+    from pythonosc.osc_message import OscMessage
+    from iipyper.osc import _build_message
+    osc = OSC(port=9994, max_senders=4, verbose=0)
+    osc.create_client('self', '127.0.0.1', 9994)
+    osc.create_client('other', '127.0.0.1', 9993)
+
+    @osc.handle
+    def ping(route, i):
+        return '/pong', i
+
+    # many short-lived peers, each expecting a reply
+    peers = []
+    for i in range(10):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(1)
+        peers.append(sock)
+        sock.sendto(_build_message('/ping', [i]), ('127.0.0.1', 9994))
+        time.sleep(0.01)
+    for i, sock in enumerate(peers):
+        assert OscMessage(sock.recv(1024)).params == [i]
+        sock.close()
+
+    stats = osc.client_stats()
+    assert stats['sockets'] == 1
+    assert stats['clients'] == 2
+    assert stats['senders'] == 4
+    assert stats['sender_misses'] == 10
+    assert stats['sender_evictions'] == 6
+    assert stats['sent'] == 10
+
+    # reply addresses can still be used as 'host:port' client names
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(1)
+    host, port = sock.getsockname()
+    osc.send('/direct', 1, client=f'{host}:{port}')
+    osc.send(f'{host}:{port}/route', 2)
+    assert OscMessage(sock.recv(1024)).params == [1]
+    assert OscMessage(sock.recv(1024)).address == '/route'
+    sock.close()
+    assert osc.get_client_by_name('nobody') is None
+    assert osc.client_stats()['clients'] == 2
+
+def test_async_sender():
+    from threading import Event
+    from iipyper.clients import AsyncSender
+
+    sent = []
+    go = Event()
+    def send(key, v):
+        go.wait()
+        sent.append((key, v))
+
+    sender = AsyncSender(send, queue_size=3, coalesce=True)
+    sender.put(('a', 0), key='a')
+    time.sleep(0.01) # ('a', 0) is now being sent
+    for v in range(1, 5):
+        sender.put(('a', v), key='a')
+        sender.put(('b', v), key='b')
+    sender.put(('c', 0))
+    assert not sender.put(('d', 0)) # full
+    go.set()
+    assert sender.wait(1)
+
+    assert sent == [('a', 0), ('a', 4), ('b', 4), ('c', 0)]
+    stats = sender.stats()
+    assert stats['coalesced'] == 6
+    assert stats['overflows'] == 1
+    assert stats['sent'] == 4 and stats['depth'] == 0
+    sender.close()
+
+def test_async_send():
+    osc = OSC(port=9992, send_mode='async', coalesce=True, verbose=0)
+    osc.create_client('self', '127.0.0.1', 9992)
+
+    rcv = []
+
+    @osc.handle
+    def latest(route, v):
+        rcv.append(v)
+
+    for v in range(1000):
+        osc.send('/latest', v)
+    assert osc.sender.wait(1)
+
+    time.sleep(0.05)
+    assert rcv[-1] == 999
+    assert rcv == sorted(rcv)
+    stats = osc.sender.stats()
+    assert stats['sent'] + stats['coalesced'] == 1000
+
+def test_native_backend():
+    osc = OSC(port=9991, backend='native', rcvbuf=2**21, verbose=0)
+    osc.create_client('self', '127.0.0.1', 9991)
+
+    rcv = []
+
+    @osc.handle
+    def burst(route, i):
+        rcv.append(i)
+
+    n = 2000
+    for i in range(n):
+        osc.send('/burst', i)
+
+    time.sleep(0.2)
+    assert rcv == list(range(n))
+    stats = osc.receive_stats()
+    assert stats['packets'] == n
+    assert stats['max_batch'] > 1
+    assert stats['rcvbuf'] >= 2**21
+    assert stats['kernel_drops'] in (0, None)
+
+def test_batch(setup_osc):
+    osc = setup_osc
+
+    rcv = defaultdict(list)
+
+    @osc.handle('/batch/*', batch_count=10)
+    def _(route, batch):
+        rcv[route].append(batch)
+
+    @osc.handle(batch_interval=0.05)
+    def batch_timed(route, batch):
+        rcv[route].append(batch)
+
+    for i in range(20):
+        osc.send('/batch/p', i, i/2)
+        osc.send('/batch/q', i, 'x')
+    for i in range(13):
+        osc.send('/batch/r', i)
+    osc.send('/batch_timed', 0)
+    osc.send('/batch_timed', 1)
+
+    time.sleep(0.3)
+    a = rcv['/batch/p']
+    assert len(a) == 2
+    assert isinstance(a[0], np.ndarray) and a[0].shape == (10, 2)
+    assert (a[1][:,0] == np.arange(10, 20)).all()
+    b = rcv['/batch/q']
+    assert len(b) == 2 and b[0][0] == (0, 'x')
+    # partial batch delivered once idle
+    c = rcv['/batch/r']
+    assert [len(x) for x in c] == [10, 3]
+    assert (c[1][:,0] == [10, 11, 12]).all()
+    assert len(rcv['/batch_timed']) == 1
+    assert (rcv['/batch_timed'][0] == [[0], [1]]).all()
+
+    # timed batches for all routes share one thread
+    import threading
+    names = [th.name for th in threading.enumerate()]
+    assert names.count('iipyper OSC batch') == 1
+    assert osc.batch_scheduler.pending() == 0
+
+    with pytest.raises(ValueError):
+        osc.handle('/batch_both', batch_count=2, batch_interval=0.1)(
+            lambda route, batch: None)
+
+def test_updater_limits():
+    from iipyper.osc import OSCSendUpdater, ReceiveUpdater
+
+    class Sent:
+        def __init__(self):
+            self.msgs = []
+        def send(self, route, *msg, client=None):
+            self.msgs.append(msg)
+
+    # wall-clock rate limit, regardless of call rate
+    osc = Sent()
+    u = OSCSendUpdater(osc, '/hz', lambda: (time.time(),), hz=20)
+    t_end = time.perf_counter() + 0.2
+    while time.perf_counter() < t_end:
+        u()
+        time.sleep(1e-3)
+    assert 3 <= len(osc.msgs) <= 5
+    assert u.stats()['rate_limited'] > 100
+
+    # change detection with epsilon, and max_interval
+    osc = Sent()
+    values = iter([0.0, 0.001, 0.5, 0.5, 0.5])
+    u = OSCSendUpdater(
+        osc, '/eps', lambda: (next(values), 'x'), count=1, 
+        epsilon=0.01, max_interval=0.05)
+    for _ in range(4):
+        u()
+    time.sleep(0.06)
+    u()
+    assert osc.msgs == [(0.0, 'x'), (0.5, 'x'), (0.5, 'x')]
+    stats = u.stats()
+    assert stats['calls'] == 5 and stats['fired'] == 3 
+    assert stats['unchanged'] == 2
+
+    # an unchanged value still waits for the rate limit before the next check
+    osc = Sent()
+    checks = []
+    u = OSCSendUpdater(
+        osc, '/const', lambda: checks.append(1) or (1.0,), count=30, 
+        epsilon=0.01)
+    for _ in range(300):
+        u()
+    assert len(osc.msgs) == 1
+    assert len(checks) == 10
+
+    # receive side keeps counter semantics by default
+    rcv = []
+    r = ReceiveUpdater(lambda *a: rcv.append(a), count=2, epsilon=0)
+    for state in [(1,), (1,), (2,)]:
+        r.set(state)
+        for _ in range(3):
+            r()
+    assert rcv == [(1,), (2,)]
+    assert r.stats()['unchanged'] == 1
+
+def test_metrics():
+    import json
+    import asyncio
+    import socket
+    from pythonosc.osc_message import OscMessage
+    from iipyper.osc import _build_message
+
+    osc = OSC(port=9990, metrics=True, verbose=0)
+    osc.create_client('self', '127.0.0.1', 9990)
+
+    @osc.handle(return_port=9990)
+    def metered(route, x:int):
+        if x < 0:
+            raise ValueError
+        if x == 1:
+            return '/metered_reply', x
+
+    @osc.handle
+    def metered_reply(route, x):
+        pass
+
+    # async handlers are counted and timed when they complete
+    @osc.handle(return_port=9990)
+    async def metered_async(route, x:int):
+        await asyncio.sleep(0.02)
+        if x < 0:
+            raise ValueError
+        if x == 1:
+            return '/metered_reply', x
+
+    for x in (0, 1, 2, -1):
+        osc.send('/metered', x)
+        osc.send('/metered_async', x)
+    osc.send('/metered', 'not an int')
+
+    time.sleep(0.1)
+    m = osc.metrics.snapshot()['routes']['/metered']
+    assert m['count'] == 5
+    assert m['errors'] == 2
+    assert m['replies'] == 1
+    assert m['parse']['count'] == 5
+    assert m['handler']['count'] == 5
+    assert m['lock_wait']['count'] == 5
+    m = osc.metrics.snapshot()['routes']['/metered_async']
+    assert m['count'] == 4
+    assert m['errors'] == 1
+    assert m['replies'] == 1
+    assert m['handler']['count'] == 4
+    assert m['handler']['mean'] >= 0.02
+    assert osc.metrics.snapshot()['routes']['/metered_reply']['count'] == 2
+
+    # scrape over OSC
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(1)
+    sock.sendto(_build_message('/iipyper/stats', []), ('127.0.0.1', 9990))
+    reply = OscMessage(sock.recv(65536))
+    sock.close()
+    assert reply.address == '/iipyper/stats'
+    assert json.loads(reply.params[0])['routes']['/metered']['count'] == 5
+
+def test_log_sink():
+    from iipyper.log import LogSink, Truncated
+
+    lines = []
+    sink = LogSink(size=4, interval=60, write=lines.append)
+    sink.sample('often', 3)
+    for i in range(7):
+        sink.log('often', 'often {}', i)
+    x = [0]
+    sink.log('lazy', 'lazy {} {}', x, Truncated('abcdefgh', 5))
+    x.append(1)
+    sink.log('full', 'full')
+    sink.flush()
+
+    assert lines == [
+        'often 0', 'often 3', 'often 6', 'lazy [0, 1] ab...',
+        'iipyper: log buffer full, 1 records dropped']
+    assert sink.stats() == {
+        'waiting': 0, 'written': 4, 'dropped': 1, 'sampled_out': 4}
+
+def test_lanes():
+    from threading import Event
+    from iipyper.workers import Lanes
+
+    lanes = Lanes(1)
+    go = Event()
+    done = []
+    slow = lanes.queue('/slow', depth=1)
+    bulk = lanes.queue('/bulk', depth=1, policy='coalesce', priority='bulk')
+    newest = lanes.queue('/newest', depth=2, policy='drop-newest')
+    control = lanes.queue('/control', depth=4, priority='control')
+
+    lanes.put(slow, go.wait)
+    time.sleep(0.01) # the worker is now blocked
+    lanes.put(control, done.append, ('/control', 0))
+    time.sleep(0.01)
+    for i in range(3):
+        lanes.put(bulk, done.append, ('/bulk/a', i), key='/bulk/a')
+    assert not lanes.put(bulk, done.append, ('/bulk/b', 0), key='/bulk/b')
+    for i in range(3):
+        lanes.put(newest, done.append, ('/newest', i))
+    go.set()
+    time.sleep(0.05)
+
+    assert done == [
+        ('/control', 0), ('/newest', 0), ('/newest', 1), ('/bulk/a', 2)]
+    stats = lanes.stats()
+    assert stats['/bulk']['coalesced'] == 2
+    assert stats['/bulk']['dropped'] == 1
+    assert stats['/newest']['dropped'] == 1
+    assert stats['/control']['residency']['count'] == 1
+    assert stats['/control']['residency']['max'] > 0.005
+
+def test_route_queues():
+    osc = OSC(port=9989, verbose=0)
+    osc.create_client('self', '127.0.0.1', 9989)
+
+    rcv = []
+
+    @osc.handle(queue=1, priority='bulk', lock=False)
+    def queued_slow(route, x):
+        time.sleep(0.05)
+        rcv.append(('slow', x))
+
+    @osc.handle
+    def queued_fast(route, x):
+        rcv.append(('fast', x))
+
+    osc.send('/queued_slow', 0)
+    time.sleep(0.01)
+    osc.send('/queued_slow', 1)
+    osc.send('/queued_slow', 2) # replaces 1
+    osc.send('/queued_fast', 0)
+    time.sleep(0.01)
+    # the fast route isn't held up by the slow one
+    assert rcv == [('fast', 0)]
+    time.sleep(0.15)
+    assert rcv == [('fast', 0), ('slow', 0), ('slow', 2)]
+
+    stats = osc.queue_stats()['/queued_slow']
+    assert stats['dropped'] == 1 and stats['handled'] == 2
+    assert stats['residency']['max'] > 0.02
+
+def test_template():
+    from iipyper import OSCSend
+    from pythonosc.osc_message import OscMessage
+    from pythonosc.osc_message_builder import OscMessageBuilder
+
+    osc = OSC(port=9988, verbose=0)
+    osc.create_client('self', '127.0.0.1', 9988)
+
+    builder = OscMessageBuilder('/template/x')
+    for v, t in ((1, 'i'), (2**40, 'h'), (0.5, 'f'), (0.25, 'd'), (True, 'T')):
+        builder.add_arg(v, t)
+    t = osc.template('/template/x', 'ihfdT')
+    assert t.encode(1, 2**40, 0.5, 0.25) == builder.build().dgram
+    assert t.struct is not None
+
+    a = np.arange(3, dtype=np.float32)
+    t = osc.template('template/y', ',isbN')
+    msg = OscMessage(t.encode(7, 'abc', a))
+    assert msg.address == '/template/y'
+    assert msg.params[:2] == [7, 'abc'] and msg.params[3] is None
+    assert np.array_equal(ndarray_from_blob(msg.params[2]), a)
+    with pytest.raises(ValueError):
+        t.encode(7)
+    with pytest.raises(ValueError):
+        osc.template('/template/z', 'iq')
+
+    rcv = []
+    @osc.handle
+    def templated(route, x:int, y:float):
+        rcv.append((x, y))
+
+    t = osc.template('/templated', 'if')
+    t.send(1, 0.5)
+    OSCSend(osc, '/templated', lambda: (2, 1.5), typetags='if')()
+    time.sleep(0.05)
+    assert rcv == [(1, 0.5), (2, 1.5)]
+
+_decode_cases = [
+    ('/a', []),
+    ('/abc', [1, 2.5, 'xyz', b'\x01\x02\x03', 0.125]),
+    ('/abcd', ['', 'abcd', b'1234', True, False, None]),
+    ('/abcdefg', [2**40, -3, 'é']),
+]
+
+@pytest.mark.parametrize('address,args', _decode_cases)
+def test_decode_message(address, args):
+    from pythonosc.osc_message import OscMessage
+    from pythonosc.osc_message_builder import OscMessageBuilder
+    from iipyper.decode import decode_message, Message
+
+    builder = OscMessageBuilder(address)
+    for a in args:
+        builder.add_arg(a, 'd' if a == 0.125 else None)
+    dgram = builder.build().dgram
+    msg = decode_message(dgram)
+    assert isinstance(msg, Message)
+    ref = OscMessage(dgram)
+    assert msg.address == ref.address
+    assert msg.params == ref.params
+    assert [*msg] == [*ref]
+
+def test_decode_packet():
+    from pythonosc.osc_message import ParseError, OscMessage
+    from pythonosc.osc_bundle import OscBundle
+    from pythonosc.osc_message_builder import OscMessageBuilder
+    from iipyper.decode import decode_packet, Message
+    from iipyper.dispatch import _timed_messages
+    from iipyper.osc import _build_message, _pack_bundles
+    from pythonosc.parsing import osc_types
+
+    # unsupported typetags fall back to python-osc
+    builder = OscMessageBuilder('/rgba')
+    builder.add_arg(0x11223344, 'r')
+    builder.add_arg([1, 2])
+    (_, msg), = decode_packet(builder.build().dgram)
+    assert isinstance(msg, OscMessage) and msg.params == [0x11223344, [1, 2]]
+
+    inner, = _pack_bundles(
+        [_build_message('/inner', [1])], osc_types.write_date(2e9), 1472)
+    outer, = _pack_bundles(
+        [_build_message('/outer', ['x', 0.5]), inner], 
+        osc_types.write_date(1e9), 1472)
+    timed = decode_packet(outer)
+    ref = _timed_messages(OscBundle(outer), [])
+    assert [(t, m.address, m.params) for t, m in timed] == [
+        (t, m.address, m.params) for t, m in ref]
+    assert all(isinstance(m, Message) for t, m in timed)
+
+    assert decode_packet(b'not osc') == []
+    with pytest.raises(ParseError):
+        decode_packet(_build_message('/short', [1.0, 2])[:-4])
+    with pytest.raises(ParseError):
+        decode_packet(b'/no/terminator')
+
+def test_fast_decoder():
+    osc = OSC(port=9987, decoder='fast', verbose=0)
+    osc.create_client('self', '127.0.0.1', 9987)
+    rcv = []
+
+    @osc.handle
+    def decoded(route, x:int, y:float, s:str, a:NDArray=None):
+        rcv.append((x, y, s, a))
+
+    osc.send('/decoded', 1, 0.5, 'abc', np.arange(3))
+    with osc.bundle():
+        osc.send('/decoded', 2, 1.5, 'def')
+    time.sleep(0.05)
+    assert [r[:3] for r in rcv] == [(1, 0.5, 'abc'), (2, 1.5, 'def')]
+    assert np.array_equal(rcv[0][3], np.arange(3))